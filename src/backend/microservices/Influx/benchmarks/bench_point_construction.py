@@ -0,0 +1,106 @@
+######### Author: Ilef Kalboussi ##########
+
+from influxdb_client import Point
+import pandas as pd
+import numpy as np
+import argparse
+import time
+import sys
+import os
+
+
+########################################################
+# Points per second for turning an api-fetcher history
+# batch into InfluxDB records, on a synthetic universe
+# (default 5k tickers x 120 monthly closes). No InfluxDB
+# is needed, only record construction/serialisation is
+# measured:
+#   - row loop: pd.to_datetime + Point per row (old path)
+#   - dataframe: client DataFrame serializer
+#   - line protocol: InfluxDBHandler.history_frame +
+#     to_line_protocol (current path)
+#
+#   python benchmarks/bench_point_construction.py
+#   python benchmarks/bench_point_construction.py --tickers 5000 --months 120 --loop-tickers 250
+########################################################
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from influx import InfluxDBHandler
+
+
+def synthetic_history(tickers: int, months: int, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end="2025-06-01", periods=months, freq="MS", tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ").tolist()
+    history = {}
+    for i in range(tickers):
+        close = 50 * np.exp(np.cumsum(rng.normal(0.005, 0.08, months)))
+        history[f"T{i:05d}"] = {"dates": dates, "close": np.round(close, 4).tolist()}
+    return history
+
+
+def row_loop(history: dict) -> list:
+    lines = []
+    for ticker, series in history.items():
+        for timestamp_str, price in zip(series["dates"], series["close"]):
+            timestamp = pd.to_datetime(timestamp_str)
+            timestamp = timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
+            if price is None:
+                continue
+            point = (
+                Point("stock_price")
+                .tag("ticker", ticker)
+                .field("close_price_history", float(price))
+                .time(timestamp)
+            )
+            lines.append(point.to_line_protocol())
+    return lines
+
+
+def dataframe_serializer(history: dict) -> list:
+    from influxdb_client.client.write.dataframe_serializer import data_frame_to_list_of_points
+    from influxdb_client.client.write_api import PointSettings
+
+    frame = InfluxDBHandler.history_frame(history).set_index("time")
+    return data_frame_to_list_of_points(
+        frame,
+        PointSettings(),
+        data_frame_measurement_name="stock_price",
+        data_frame_tag_columns=["ticker"],
+    )
+
+
+def line_protocol(history: dict) -> list:
+    return InfluxDBHandler.to_line_protocol(InfluxDBHandler.history_frame(history))
+
+
+def measure(name: str, func, history: dict, repeat: int):
+    best = None
+    points = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        points = len(func(history))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<16} {len(history):>8} {points:>10} {best:>10.3f} {points / max(best, 1e-9):>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark InfluxDB point construction")
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--months", type=int, default=120)
+    parser.add_argument("--loop-tickers", type=int, default=250, help="the row loop is slow, run it on a subset")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.tickers, args.months)
+    subset = dict(list(history.items())[:args.loop_tickers])
+
+    print(f"{'path':<16} {'tickers':>8} {'points':>10} {'best s':>10} {'points/s':>14}")
+    measure("row loop", row_loop, subset, 1)
+    measure("dataframe", dataframe_serializer, history, args.repeat)
+    measure("line protocol", line_protocol, history, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
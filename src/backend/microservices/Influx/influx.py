@@ -4,16 +4,22 @@ from influxdb_client import InfluxDBClient, Point, WriteOptions
 from influxdb_client.client.write_api import ASYNCHRONOUS
 from datetime import timedelta, datetime
 from dataclasses import dataclass
+from itertools import chain
 import pandas as pd
+import numpy as np
 import logging
 import asyncio
 import httpx
+import re
 import os
 
 
 logger = logging.getLogger(__name__)
 
 
+TAG_ESCAPE = re.compile(r"([,= ])")
+
+
 @dataclass
 class InfluxDBHandler:
     """
@@ -38,48 +44,137 @@ class InfluxDBHandler:
             raise
             
 
-    async def write_stock_data_to_influx(self, tickers: list, client: InfluxDBClient, CONCURRENCY_LIMIT=5):
+    async def latest_history_timestamps(self, client: InfluxDBClient) -> dict:
+        """
+        Latest stored close_price_history timestamp per ticker, in one query.
+        """
+        query = f'''
+        from(bucket: "{os.getenv('INFLUXDB_BUCKET')}")
+          |> range(start: 0)
+          |> filter(fn: (r) => r["_measurement"] == "stock_price")
+          |> filter(fn: (r) => r["_field"] == "close_price_history")
+          |> group(columns: ["ticker"])
+          |> last()
+          |> keep(columns: ["ticker", "_time"])
+        '''
+        try:
+            result = await asyncio.to_thread(client.query_api().query, query=query, org=os.getenv("INFLUXDB_ORG"))
+        except Exception as e:
+            logger.error(f"[Influx ERROR] Latest timestamps query failed, syncing full history: {e}")
+            return {}
+
+        return {
+            record.values["ticker"]: pd.Timestamp(record.get_time())
+            for table in result
+            for record in table.records
+        }
+
+
+    @staticmethod
+    def history_frame(history: dict, since: str = None) -> pd.DataFrame:
+        """
+        Flattens a columnar {ticker: {"dates": [...], "close": [...]}} batch
+        from the api-fetcher into one (ticker, time, close_price_history)
+        frame. All timestamps are parsed and normalised to UTC in one call,
+        missing prices and points before since (the requested start) are
+        dropped.
+        """
+        series = {ticker: data for ticker, data in history.items() if "error" not in data and data.get("dates")}
+        lengths = [len(data["dates"]) for data in series.values()]
+        frame = pd.DataFrame({
+            "ticker": np.repeat(np.array(list(series), dtype=object), lengths),
+            "time": pd.to_datetime(list(chain.from_iterable(data["dates"] for data in series.values())),
+                                   utc=True, format="ISO8601"),
+            "close_price_history": np.array(list(chain.from_iterable(data["close"] for data in series.values())),
+                                            dtype=float),
+        })
+
+        keep = frame["close_price_history"].notna()
+        if since:
+            keep &= frame["time"] >= pd.Timestamp(since, tz="UTC")
+        return frame[keep]
+
+
+    @staticmethod
+    def to_line_protocol(frame: pd.DataFrame, measurement: str = "stock_price",
+                         field: str = "close_price_history") -> list:
+        """
+        Line protocol for a history_frame without one Point per row. The
+        "measurement,ticker=... field=" prefix is escaped and built once
+        per distinct ticker and spread over the rows by their codes.
+        """
+        if frame.empty:
+            return []
+        codes, tickers = pd.factorize(frame["ticker"])
+        tags = [TAG_ESCAPE.sub(r"\\\1", str(ticker)) for ticker in tickers]
+        prefixes = np.array([f"{measurement},ticker={tag} {field}=" for tag in tags], dtype=object)[codes]
+        nanoseconds = (frame["time"] - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(1, "ns")
+        return [
+            f"{prefix}{value} {timestamp}"
+            for prefix, value, timestamp in zip(prefixes.tolist(), frame[field].tolist(), nanoseconds.tolist())
+        ]
+
+
+    async def write_stock_data_to_influx(self, tickers: list, client: InfluxDBClient, CONCURRENCY_LIMIT=5, BATCH_SIZE=500,
+                                         SYNC_OVERLAP=timedelta(days=31), WRITE_CHUNK=5000):
+        """
+        Incremental sync of the price history. Tickers already in InfluxDB
+        are only fetched from their latest stored point minus SYNC_OVERLAP
+        and every bar since that start is written again. Yahoo stamps the
+        running month with its latest trade time, so the stored latest
+        point is newer than the monthly bar that still gets its final
+        close; re-written bars simply overwrite their stored points.
+        Tickers without stored history get the full history.
+        """
         api = client.write_api(write_options=WriteOptions(write_type=ASYNCHRONOUS, batch_size=100, flush_interval=1000))
         semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
 
+        latest = await self.latest_history_timestamps(client)
+        tickers_by_start = {}
+        for ticker in tickers:
+            last = latest.get(ticker)
+            start = (last - SYNC_OVERLAP).strftime("%Y-%m-%d") if last is not None else None
+            tickers_by_start.setdefault(start, []).append(ticker)
+
+        full_sync = len(tickers_by_start.get(None, []))
+        logger.info(f"[INFLUXDB] Syncing {len(tickers) - full_sync} tickers incrementally, {full_sync} in full")
+
         async with httpx.AsyncClient() as http_client:
 
-            async def process_ticker(ticker):
+            async def process_batch(batch, start):
                 async with semaphore:
                     try:
-                        res = await http_client.get(f"http://api-fetcher:8001/stock-history/{ticker}", timeout=None)
+                        res = await http_client.post(
+                            "http://api-fetcher:8001/stock-history",
+                            json={"tickers": batch, "start": start},
+                            timeout=None
+                        )
                         if res.status_code != 200:
-                            logger.warning(f"Stock history unavailable for {ticker}: {res.status_code}")
+                            logger.warning(f"Stock history unavailable for batch of {len(batch)}: {res.status_code}")
                             return
-
-                        price_data = res.json()
-                        points = []
-
-                        for timestamp_str, price in price_data.items():
-                            try:
-                                timestamp = pd.to_datetime(timestamp_str)
-                                timestamp = timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
-
-                                if price is None:
-                                    continue
-
-                                points.append(
-                                    Point("stock_price")
-                                    .tag("ticker", ticker)
-                                    .field("close_price_history", float(price))
-                                    .time(timestamp)
-                                )
-                            except Exception as e:
-                                logger.error(f"[ParseError] {ticker} at {timestamp_str}: {e}")
-
-                        if points:
-                            api.write(bucket=os.getenv("INFLUXDB_BUCKET"), org=os.getenv("INFLUXDB_ORG"), record=points)
-                            logging.info(f'[INFLUXDB] Writing timeseries for {ticker} to database')
-
+                        history = res.json()
                     except Exception as e:
-                        logger.error(f"[HTTPError] {ticker}: {e}")
-
-            await asyncio.gather(*[process_ticker(ticker) for ticker in tickers])
+                        logger.error(f"[HTTPError] batch of {len(batch)}: {e}")
+                        return
+
+                for ticker, series in history.items():
+                    if "error" in series:
+                        logger.warning(f"Stock history unavailable for {ticker}: {series['error']}")
+
+                lines = self.to_line_protocol(self.history_frame(history, start))
+                for i in range(0, len(lines), WRITE_CHUNK):
+                    api.write(
+                        bucket=os.getenv("INFLUXDB_BUCKET"),
+                        org=os.getenv("INFLUXDB_ORG"),
+                        record="\n".join(lines[i:i + WRITE_CHUNK])
+                    )
+                logging.info(f'[INFLUXDB] Writing {len(lines)} points for {len(history)} tickers to database')
+
+            await asyncio.gather(*[
+                process_batch(group[i:i + BATCH_SIZE], start)
+                for start, group in tickers_by_start.items()
+                for i in range(0, len(group), BATCH_SIZE)
+            ])
 
 
     async def write_forecast_df(self, datapoint, ticker, client:InfluxDBClient):
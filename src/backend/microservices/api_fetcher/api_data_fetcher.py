@@ -1,24 +1,32 @@
 ######### Author: Kevin Garrison ##########
 
 
-from docling.document_converter import DocumentConverter
-from docling.datamodel.base_models import DocumentStream
+from concurrent.futures.process import BrokenProcessPool
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from doc_converter import convert_html_to_markdown, init_worker, worker_stats, conversion_fingerprint, WARMUP_SAMPLE_PATH
 from dataclasses import dataclass, field
 from bs4 import XMLParsedAsHTMLWarning
+from email.utils import parsedate_to_datetime
 from urllib.parse import urlparse
 from yahooquery import Screener
-from typing import List, Tuple
+from typing import AsyncIterator, Callable, List, Tuple
+from ttl_cache import TTLCache, CacheEntry
+from filing_sections import section_form
+from filing_index import FilingIndex
+from disk_cache import DiskCache
 from dotenv import load_dotenv
 from bs4 import BeautifulSoup
+import multiprocessing
+import redis.asyncio as aioredis
 import yahooquery as yq
-from io import BytesIO
 import yfinance as yf
 import pandas as pd
 import numpy as np
-import requests
 import warnings
 import logging
 import asyncio
+import random
+import hashlib
 import httpx
 import json
 import html
@@ -36,44 +44,519 @@ warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 load_dotenv()
 
 
+STOCK_FACT_MODULES = ["summaryProfile", "summaryDetail", "financialData", "defaultKeyStatistics"]
+# facts taken from summaryProfile
+PROFILE_FACTS = ["company_name", "sector", "industry", "website", "employees"]
+
+
+@dataclass
+class TokenBucket:
+    """
+    Async token bucket shared by every SEC.gov request of the process.
+    SEC's fair-access policy allows 10 requests/second in total, so the
+    defaults keep rate + burst at or below that in any one-second window.
+    """
+    rate: float = 9.0
+    capacity: float = 1.0
+    _tokens: float = field(init=False)
+    _updated: float = field(init=False)
+    _blocked_until: float = field(init=False, default=0.0)
+    _lock: asyncio.Lock = field(init=False)
+
+
+    def __post_init__(self):
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+
+    def pause(self, seconds: float):
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class RecordBroadcast:
+    """
+    Records of one running company-context pipeline. Every subscriber
+    replays what was emitted so far and then follows along live, so a
+    request that joins a running load misses nothing.
+    """
+    records: list = field(default_factory=list)
+    finished: bool = False
+    _wakeup: asyncio.Event = field(init=False, default_factory=asyncio.Event)
+
+
+    def emit(self, record: dict):
+        self.records.append(record)
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+
+    def finish(self):
+        self.finished = True
+        self._wakeup.set()
+
+
+    async def follow(self) -> AsyncIterator[dict]:
+        sent = 0
+        while True:
+            wakeup = self._wakeup
+            while sent < len(self.records):
+                yield self.records[sent]
+                sent += 1
+            if self.finished:
+                return
+            await wakeup.wait()
+
+
 @dataclass
 class API_Fetcher:
     max_concurrent: int = 10
     retry_attempts: int = 3
     retry_delay: float = 1.5
+    sec_max_connections: int = 20
+    sec_max_keepalive: int = 10
+    sec_keepalive_expiry: float = 30.0
+    sec_connect_timeout: float = 5.0
+    sec_read_timeout: float = 30.0
+    sec_write_timeout: float = 10.0
+    sec_pool_timeout: float = 10.0
+    sec_requests_per_second: float = 9.0
+    sec_max_backoff: float = 30.0
+    cache_dir: str = os.getenv('API_FETCHER_CACHE_DIR', 'cache')
+    filing_cache_max_bytes: int = int(os.getenv('FILING_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+    markdown_cache_max_bytes: int = int(os.getenv('MARKDOWN_CACHE_MAX_BYTES', 1024 ** 3))
+    company_tickers_revalidate_interval: float = float(os.getenv('COMPANY_TICKERS_REVALIDATE_INTERVAL', 60 * 60))
+    submissions_ttl: float = float(os.getenv('SUBMISSIONS_TTL', 15 * 60))
+    submissions_stale_ttl: float = float(os.getenv('SUBMISSIONS_STALE_TTL', 24 * 60 * 60))
+    submissions_cache_max_bytes: int = int(os.getenv('SUBMISSIONS_CACHE_MAX_BYTES', 256 * 1024 ** 2))
+    facts_ttl: float = float(os.getenv('FACTS_TTL', 5 * 60))
+    facts_stale_ttl: float = float(os.getenv('FACTS_STALE_TTL', 60 * 60))
+    news_ttl: float = float(os.getenv('NEWS_TTL', 2 * 60))
+    news_stale_ttl: float = float(os.getenv('NEWS_STALE_TTL', 15 * 60))
+    yahoo_cache_max_bytes: int = int(os.getenv('YAHOO_CACHE_MAX_BYTES', 64 * 1024 ** 2))
+    yahoo_workers: int = int(os.getenv('YAHOO_WORKERS', 8))
+    context_result_ttl: float = float(os.getenv('CONTEXT_RESULT_TTL', 60))
+    context_cache_max_bytes: int = int(os.getenv('CONTEXT_CACHE_MAX_BYTES', 512 * 1024 ** 2))
+    market_cap_ttl: float = float(os.getenv('MARKET_CAP_TTL', 15 * 60))
+    market_cap_chunk_size: int = int(os.getenv('MARKET_CAP_CHUNK_SIZE', 200))
+    market_cap_cache_max_entries: int = int(os.getenv('MARKET_CAP_CACHE_MAX_ENTRIES', 50_000))
+    logo_ttl: float = float(os.getenv('LOGO_TTL', 24 * 60 * 60))
+    logo_negative_ttl: float = float(os.getenv('LOGO_NEGATIVE_TTL', 60 * 60))
+    logo_cache_max_bytes: int = int(os.getenv('LOGO_CACHE_MAX_BYTES', 32 * 1024 ** 2))
+    logo_disk_cache_max_bytes: int = int(os.getenv('LOGO_DISK_CACHE_MAX_BYTES', 256 * 1024 ** 2))
+    domain_ttl: float = float(os.getenv('DOMAIN_TTL', 7 * 24 * 60 * 60))
+    domain_cache_max_entries: int = int(os.getenv('DOMAIN_CACHE_MAX_ENTRIES', 50_000))
+    universe_refresh_interval: float = float(os.getenv('UNIVERSE_REFRESH_INTERVAL', 60 * 60))
+    universe_refresh_tick: float = float(os.getenv('UNIVERSE_REFRESH_TICK', 60))
+    universe_screeners_per_tick: int = int(os.getenv('UNIVERSE_SCREENERS_PER_TICK', 5))
+    universe_wait_timeout: float = float(os.getenv('UNIVERSE_WAIT_TIMEOUT', 20))
+    docling_workers: int = int(os.getenv('DOCLING_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+    docling_timeout: float = float(os.getenv('DOCLING_TIMEOUT', 180))
+    docling_kill_grace: float = float(os.getenv('DOCLING_KILL_GRACE', 30))
+    docling_max_doc_bytes: int = int(os.getenv('DOCLING_MAX_DOC_BYTES', 20 * 1024 ** 2))
+    docling_warmup: bool = os.getenv('DOCLING_WARMUP', 'true').lower() == 'true'
+    conversion_engine: str = os.getenv('CONVERSION_ENGINE', 'docling')
+    filing_sections: str = os.getenv('FILING_SECTIONS', 'risk_factors,mda')
     _semaphore: asyncio.Semaphore = field(init=False)
+    _sec_client: httpx.AsyncClient = field(init=False, default=None)
+    _docling_pool: ProcessPoolExecutor = field(init=False, default=None)
+    docling_stats: dict = field(init=False, default_factory=dict)
+    _sec_rate_limiter: TokenBucket = field(init=False)
+    filing_cache: DiskCache = field(init=False)
+    markdown_cache: DiskCache = field(init=False)
+    submissions_cache: TTLCache = field(init=False)
+    facts_cache: TTLCache = field(init=False)
+    news_cache: TTLCache = field(init=False)
+    context_cache: TTLCache = field(init=False)
+    market_cap_cache: TTLCache = field(init=False)
+    logo_cache: TTLCache = field(init=False)
+    logo_disk_cache: DiskCache = field(init=False)
+    domain_cache: TTLCache = field(init=False)
+    _redis_client: aioredis.Redis = field(init=False, default=None)
+    _yahoo_executor: ThreadPoolExecutor = field(init=False)
+    _conversion_fingerprint: str = field(init=False)
+    _company_tickers_df: pd.DataFrame = field(init=False, default=None)
+    _company_tickers_meta: dict = field(init=False, default_factory=dict)
+    _company_tickers_refresh: asyncio.Task = field(init=False, default=None)
+    _company_tickers_attempted_at: float = field(init=False, default=0.0)
+    _ticker_index: dict = field(init=False, default_factory=dict)
+    _ticker_screener: list = field(init=False, default_factory=list)
+    _screener_members: dict = field(init=False, default_factory=dict)
+    _universe: dict = field(init=False, default=None)
+    _universe_ready: asyncio.Event = field(init=False)
+    _universe_task: asyncio.Task = field(init=False, default=None)
+    _universe_refreshing: bool = field(init=False, default=False)
+    _context_broadcasts: dict = field(init=False, default_factory=dict)
 
 
     def __post_init__(self):
         self._semaphore = asyncio.Semaphore(self.max_concurrent)
-    
+        self._sec_rate_limiter = TokenBucket(rate=self.sec_requests_per_second)
+        self._universe_ready = asyncio.Event()
+        # blocking yfinance/yahooquery calls get their own bounded pool so a
+        # slow Yahoo cannot take every default executor thread
+        self._yahoo_executor = ThreadPoolExecutor(max_workers=self.yahoo_workers, thread_name_prefix='yahoo')
+        self.filing_cache = DiskCache(
+            directory=os.path.join(self.cache_dir, 'filings'),
+            max_bytes=self.filing_cache_max_bytes
+        )
+        self.markdown_cache = DiskCache(
+            directory=os.path.join(self.cache_dir, 'markdown'),
+            max_bytes=self.markdown_cache_max_bytes
+        )
+        self._conversion_fingerprint = conversion_fingerprint(self.conversion_engine)
+        self.submissions_cache = TTLCache(
+            name='SubmissionsCache',
+            ttl=self.submissions_ttl,
+            stale_ttl=self.submissions_stale_ttl,
+            max_bytes=self.submissions_cache_max_bytes
+        )
+        self.facts_cache = TTLCache(
+            name='FactsCache',
+            ttl=self.facts_ttl,
+            stale_ttl=self.facts_stale_ttl,
+            max_bytes=self.yahoo_cache_max_bytes,
+            track_keys=True
+        )
+        self.news_cache = TTLCache(
+            name='NewsCache',
+            ttl=self.news_ttl,
+            stale_ttl=self.news_stale_ttl,
+            max_bytes=self.yahoo_cache_max_bytes,
+            track_keys=True
+        )
+        # single-flight for the whole company-context pipeline: concurrent
+        # requests for a ticker share one run, the result lives for a short TTL
+        self.context_cache = TTLCache(
+            name='ContextCache',
+            ttl=self.context_result_ttl,
+            max_bytes=self.context_cache_max_bytes,
+            track_keys=True
+        )
+        # one entry per ticker with size 1, so max_bytes bounds the entry count
+        self.market_cap_cache = TTLCache(
+            name='MarketCapCache',
+            ttl=self.market_cap_ttl,
+            max_bytes=self.market_cap_cache_max_entries
+        )
+        # logos: LRU in memory in front of the disk cache, misses are kept
+        # in memory as b'' for logo_negative_ttl
+        self.logo_cache = TTLCache(
+            name='LogoCache',
+            ttl=self.logo_ttl,
+            max_bytes=self.logo_cache_max_bytes
+        )
+        self.logo_disk_cache = DiskCache(
+            directory=os.path.join(self.cache_dir, 'logos'),
+            max_bytes=self.logo_disk_cache_max_bytes
+        )
+        # one entry per ticker with size 1, like the market cap cache
+        self.domain_cache = TTLCache(
+            name='DomainCache',
+            ttl=self.domain_ttl,
+            max_bytes=self.domain_cache_max_entries
+        )
 
-    async def fetch_company_cik_ticker_title(self)->pd.DataFrame:
+
+    async def connect_to_redis(self, host: str = None, port: int = None, db: int = None) -> aioredis.Redis:
+        '''
+        Optional shared tier for the Yahoo caches. Uses its own Redis db
+        (REDIS_DB_API_FETCHER, default 1) because the rag-chatbot flushes
+        db 0. Without Redis the caches simply stay in-process.
+        '''
         try:
-            headers = {'User-Agent': os.environ.get('USER_AGENT_SEC')}
-            logger.info(f"[Header_SEC]: {headers}")
-            async with httpx.AsyncClient() as client:
-                company_tickers = await client.get(
-                    "https://www.sec.gov/files/company_tickers.json",
-                    headers=headers,
-                    timeout = None
-                )
-                logger.info(f"SEC response status code: {company_tickers.status_code}")
-                logger.info(f"Response headers: {company_tickers.headers}")
-                
-                if company_tickers.status_code != 200:
-                    logger.warning(f"Unexpected status from SEC: {company_tickers.status_code}")
-                    logger.debug(f"Response content: {company_tickers.text[:300]}")
-                    
-                company_tickers.raise_for_status()
-                company_data = pd.DataFrame(company_tickers.json()).T
-                return company_data
+            host = host or os.getenv("REDIS_HOST")
+            if not host:
+                logger.info("[Redis] REDIS_HOST not set, Yahoo caches stay in-process")
+                return None
+            port = int(port or os.getenv("REDIS_PORT", 6379))
+            db = int(db if db is not None else os.getenv("REDIS_DB_API_FETCHER", 1))
+
+            client = aioredis.Redis(host=host, port=port, db=db)
+            await client.ping()
+            logger.info(f"[Redis] Connected to {host}:{port} (db={db})")
+        except Exception as e:
+            logger.error(f"[Redis ERROR] Connection failed, Yahoo caches stay in-process: {e}")
+            return None
+
+        self._redis_client = client
+        self.facts_cache.redis_client = client
+        self.news_cache.redis_client = client
+        return client
+
+
+    async def close_redis(self):
+        if self._redis_client is not None:
+            await self._redis_client.aclose()
+        self._redis_client = None
+        self.facts_cache.redis_client = None
+        self.news_cache.redis_client = None
+
+
+    async def open_sec_client(self) -> httpx.AsyncClient:
+        '''
+        Returns the shared SEC.gov client, creating it on first use.
+        The client keeps connections alive and multiplexes over HTTP/2
+        so www.sec.gov and data.sec.gov are only handshaked once.
+        '''
+        if self._sec_client is None or self._sec_client.is_closed:
+            headers = {
+                'User-Agent': os.getenv('USER_AGENT_SEC', 'default-agent'),
+                'Accept-Encoding': 'gzip, deflate',
+            }
+            self._sec_client = httpx.AsyncClient(
+                http2=True,
+                headers=headers,
+                limits=httpx.Limits(
+                    max_connections=self.sec_max_connections,
+                    max_keepalive_connections=self.sec_max_keepalive,
+                    keepalive_expiry=self.sec_keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    connect=self.sec_connect_timeout,
+                    read=self.sec_read_timeout,
+                    write=self.sec_write_timeout,
+                    pool=self.sec_pool_timeout,
+                ),
+            )
+            logger.info(f"[SEC Client] Opened shared client (http2, max_connections={self.sec_max_connections})")
+        return self._sec_client
+
+
+    async def close_sec_client(self):
+        if self._sec_client is not None and not self._sec_client.is_closed:
+            await self._sec_client.aclose()
+            logger.info("[SEC Client] Closed shared client")
+        self._sec_client = None
+
+
+    def start_docling_pool(self) -> ProcessPoolExecutor:
+        '''
+        Docling is CPU bound, so conversions run in a process pool instead
+        of the event loop. Workers are spawned (not forked) to stay clear of
+        the threads torch and the event loop already started in this process.
+        '''
+        if self._docling_pool is None:
+            self._docling_pool = ProcessPoolExecutor(
+                max_workers=self.docling_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(WARMUP_SAMPLE_PATH if self.docling_warmup else None, self.conversion_engine),
+            )
+            logger.info(f"[docling] Started process pool with {self.docling_workers} {self.conversion_engine} workers")
+        return self._docling_pool
+
+
+    async def preload_docling_pool(self):
+        '''
+        Spawns every docling worker up front so each one builds its warm
+        DocumentConverter at service start instead of on the first request.
+        Records per-worker initialisation time for /metrics.
+        '''
+        start = time.time()
+        pool = self.start_docling_pool()
+        loop = asyncio.get_running_loop()
+        try:
+            results = await asyncio.gather(*[
+                loop.run_in_executor(pool, worker_stats) for _ in range(self.docling_workers)
+            ])
+        except Exception as e:
+            logger.error(f"[docling] Preloading workers failed: {e}")
+            return
+
+        self.docling_stats = {
+            "workers": self.docling_workers,
+            "warmup": self.docling_warmup,
+            "engine": self.conversion_engine,
+            "preload_seconds": round(time.time() - start, 3),
+            "worker_init_seconds": {str(r["pid"]): r["init_seconds"] for r in results},
+        }
+        logger.info(f"[docling] Workers ready - {self.docling_stats['preload_seconds']:.2f}s")
+
+
+    def _recycle_docling_pool(self, pool: ProcessPoolExecutor, reason: str) -> bool:
+        '''
+        Replaces a broken or stuck pool with a fresh one. Only the pool
+        that is still current is recycled, so a task that notices the
+        failure late never tears down a pool another task just started.
+        '''
+        if pool is None or self._docling_pool is not pool:
+            return False
+        self._docling_pool = None
+        # a stuck worker never returns on its own; ProcessPoolExecutor has
+        # no public way to terminate its workers before Python 3.14
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False)
+        logger.warning(f"[docling] Recycling process pool: {reason}")
+        self.start_docling_pool()
+        return True
+
+
+    def shutdown_docling_pool(self):
+        if self._docling_pool is not None:
+            self._docling_pool.shutdown(wait=False, cancel_futures=True)
+            logger.info("[docling] Shut down process pool")
+        self._docling_pool = None
+
+
+    def _retry_after_seconds(self, response: httpx.Response, attempt: int) -> float:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(float(retry_after), self.sec_max_backoff)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(max(delay, 0.0), self.sec_max_backoff)
+                except (TypeError, ValueError):
+                    pass
+        backoff = self.retry_delay * 2 ** (attempt - 1)
+        return min(backoff + random.uniform(0, self.retry_delay), self.sec_max_backoff)
+
+
+    async def _sec_get(self, url: str, **kwargs) -> httpx.Response:
+        '''
+        GET against SEC.gov through the shared client and rate limiter.
+        429/503 answers are retried honouring Retry-After, otherwise with
+        exponential backoff; a 429 also pauses the bucket for every caller.
+        '''
+        client = await self.open_sec_client()
+        for attempt in range(1, self.retry_attempts + 1):
+            await self._sec_rate_limiter.acquire()
+            response = await client.get(url, **kwargs)
+            if response.status_code not in (429, 503) or attempt == self.retry_attempts:
+                return response
+
+            delay = self._retry_after_seconds(response, attempt)
+            logger.warning(f"[SEC Client] {response.status_code} for {url}, retry {attempt} in {delay:.1f}s")
+            if response.status_code == 429:
+                self._sec_rate_limiter.pause(delay)
+            await asyncio.sleep(delay)
+
+
+    def _company_tickers_snapshot_paths(self) -> tuple[str, str]:
+        return (
+            os.path.join(self.cache_dir, 'company_tickers.json'),
+            os.path.join(self.cache_dir, 'company_tickers.meta.json'),
+        )
+
+
+    def load_company_tickers_snapshot(self) -> pd.DataFrame:
+        '''
+        Loads the last persisted company_tickers.json (and its validators)
+        so the service can answer on cold start without asking SEC.gov.
+        '''
+        data_path, meta_path = self._company_tickers_snapshot_paths()
+        try:
+            with open(data_path, 'rb') as f:
+                company_data = pd.DataFrame(json.loads(f.read())).T
+            with open(meta_path, 'r') as f:
+                self._company_tickers_meta = json.load(f)
+        except (FileNotFoundError, ValueError) as e:
+            logger.info(f"[SEC] No usable company_tickers snapshot: {e}")
+            return None
+
+        self._company_tickers_df = company_data
+        logger.info(f"[SEC] Loaded company_tickers snapshot ({len(company_data)} rows)")
+        return company_data
+
+
+    def _write_company_tickers_snapshot(self, content: bytes, meta: dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for path, data in zip(self._company_tickers_snapshot_paths(), (content, json.dumps(meta).encode('utf-8'))):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+
+    async def _refresh_company_tickers(self) -> pd.DataFrame:
+        '''
+        Conditional GET of company_tickers.json. A 304 keeps the snapshot
+        without parsing anything, a 200 replaces and persists it.
+        '''
+        headers = {}
+        if self._company_tickers_df is not None:
+            if self._company_tickers_meta.get('etag'):
+                headers['If-None-Match'] = self._company_tickers_meta['etag']
+            if self._company_tickers_meta.get('last_modified'):
+                headers['If-Modified-Since'] = self._company_tickers_meta['last_modified']
+
+        company_tickers = await self._sec_get("https://www.sec.gov/files/company_tickers.json", headers=headers)
+        logger.info(f"SEC response status code: {company_tickers.status_code}")
+        logger.info(f"Response headers: {company_tickers.headers}")
+
+        if company_tickers.status_code == 304:
+            self._company_tickers_meta['checked_at'] = time.time()
+            return self._company_tickers_df
+
+        if company_tickers.status_code != 200:
+            logger.warning(f"Unexpected status from SEC: {company_tickers.status_code}")
+            logger.debug(f"Response content: {company_tickers.text[:300]}")
+
+        company_tickers.raise_for_status()
+        company_data = pd.DataFrame(company_tickers.json()).T
+        meta = {
+            'etag': company_tickers.headers.get('ETag'),
+            'last_modified': company_tickers.headers.get('Last-Modified'),
+            'checked_at': time.time(),
+        }
+        await asyncio.to_thread(self._write_company_tickers_snapshot, company_tickers.content, meta)
+        self._company_tickers_df = company_data
+        self._company_tickers_meta = meta
+        return company_data
+
+
+    async def _refresh_company_tickers_safely(self) -> pd.DataFrame:
+        try:
+            return await self._refresh_company_tickers()
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error while fetching SEC data: {e}")
         except httpx.RequestError as e:
             logger.error(f"Request error: {e}")
         except Exception as e:
-            logger.exception(f"Failed 'fetch_company_cik_ticker_title': {e}")    
+            logger.exception(f"Failed 'fetch_company_cik_ticker_title': {e}")
+        return self._company_tickers_df
+
+
+    async def fetch_company_cik_ticker_title(self)->pd.DataFrame:
+        '''
+        Returns the SEC ticker/CIK/title table. When a snapshot exists it is
+        returned right away and revalidated in the background, at most once
+        per company_tickers_revalidate_interval (also after a failed
+        attempt); only the very first start without snapshot waits for SEC.gov.
+        '''
+        if self._company_tickers_df is None:
+            await asyncio.to_thread(self.load_company_tickers_snapshot)
+
+        if self._company_tickers_df is None:
+            company_data = await self._refresh_company_tickers_safely()
+            return company_data if company_data is not None else pd.DataFrame()
+
+        last_check = max(self._company_tickers_meta.get('checked_at') or 0, self._company_tickers_attempted_at)
+        due = time.time() - last_check >= self.company_tickers_revalidate_interval
+        if due and (self._company_tickers_refresh is None or self._company_tickers_refresh.done()):
+            self._company_tickers_attempted_at = time.time()
+            self._company_tickers_refresh = asyncio.create_task(self._refresh_company_tickers_safely())
+        return self._company_tickers_df
     
     
     def filter_stocks_screeners_sectors(self, categories: List[str]) -> List[str]:
@@ -121,38 +604,244 @@ class API_Fetcher:
         ]
 
 
-    async def get_available_company_data(self) -> Tuple[pd.DataFrame, List]:
+    async def get_available_company_data(self) -> Tuple[pd.DataFrame, List, List]:
+        '''
+        Company universe (SEC companies that appear in at least one Yahoo
+        screener) from the in-memory snapshot the universe refresher keeps
+        up to date. Only waits when no snapshot has been built or loaded
+        yet, and at most universe_wait_timeout; without a universe the
+        result is empty.
+        '''
+        if self._universe_task is None:
+            self.start_universe_refresher()
+        try:
+            await asyncio.wait_for(self._universe_ready.wait(), timeout=self.universe_wait_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[Universe] No universe after {self.universe_wait_timeout}s, answering empty")
+            return pd.DataFrame(), [], []
+        universe = self._universe
+        return universe['companies'], universe['screeners'], universe['ticker_screener']
+
+
+    def _universe_snapshot_path(self) -> str:
+        return os.path.join(self.cache_dir, 'universe.json')
+
+
+    def _write_universe_snapshot(self, content: bytes):
+        path = self._universe_snapshot_path()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+    async def load_universe_snapshot(self) -> bool:
+        '''
+        Restores the screener memberships persisted by the last refresh, so
+        /companies can answer right after a restart. Screeners keep their
+        original refresh time and are picked up by the refresher once stale.
+        '''
+        try:
+            with open(self._universe_snapshot_path(), 'rb') as f:
+                snapshot = json.loads(f.read())
+        except (FileNotFoundError, ValueError) as e:
+            logger.info(f"[Universe] No usable snapshot: {e}")
+            return False
+
+        self._screener_members = snapshot.get('screener_members', {})
+        if not self._screener_members:
+            return False
+        await self._rebuild_universe()
+        logger.info(f"[Universe] Loaded snapshot with {len(self._screener_members)} screeners")
+        return True
+
+
+    def _current_screener_ids(self) -> list[str]:
         screener_dict = Screener().available_screeners
-        screener_ids = [
+        return [
             s for s in self.filter_stocks_screeners_sectors(screener_dict)
             if isinstance(s, str) and s
         ]
 
-        logger.info(f"[CompanyData] Found {len(screener_ids)} screener IDs from YahooQuery")
 
-        try:
-            tickers, screeners, ticker_screener = await self.get_tickers_from_screeners_async(screener_ids)
-        except Exception as e:
-            logger.error(f"[CompanyData] Error fetching tickers from screeners: {e}")
-            return pd.DataFrame(), []
+    def _stale_screeners(self, screener_ids: list[str]) -> list[str]:
+        '''
+        Screeners older than universe_refresh_interval, never fetched ones
+        first, then oldest first.
+        '''
+        now = time.time()
+        ages = {
+            sid: now - self._screener_members[sid]['refreshed_at'] if sid in self._screener_members else float('inf')
+            for sid in screener_ids
+        }
+        stale = [sid for sid, age in ages.items() if age >= self.universe_refresh_interval]
+        return sorted(stale, key=lambda sid: ages[sid], reverse=True)
 
+
+    async def _rebuild_universe(self) -> bool:
+        '''
+        Intersects the screener memberships with the SEC ticker table and
+        swaps in the new snapshot. Returns True when the universe changed.
+        '''
+        if not self._screener_members:
+            return False
         company_ids = await self.fetch_company_cik_ticker_title()
         if company_ids.empty:
-            logger.warning("[CompanyData] Company ID dataset is empty.")
-            return pd.DataFrame(), []
-        
-        valid_tickers = company_ids["ticker"].to_list()
-        common = set(valid_tickers) & set(tickers)
-        subset = company_ids[company_ids["ticker"].isin(common)].copy()
+            logger.warning("[Universe] Company ID dataset is empty.")
+            return False
 
-        return subset, screeners, ticker_screener
+        ticker_screener = [
+            (screener_id, ticker)
+            for screener_id, member in sorted(self._screener_members.items())
+            for ticker in member['tickers']
+        ]
+        tickers = {ticker for _, ticker in ticker_screener}
+        subset = company_ids[company_ids["ticker"].isin(tickers)].copy()
+        screeners = sorted({screener for screener, member in self._screener_members.items() if member['tickers']})
+
+        version = hashlib.sha256(
+            json.dumps([ticker_screener, sorted(subset['ticker'].to_list())]).encode('utf-8')
+        ).hexdigest()[:16]
+        if self._universe is not None and self._universe['version'] == version:
+            self._universe['checked_at'] = time.time()
+            return False
+
+        self._universe = {
+            'companies': subset,
+            'screeners': screeners,
+            'ticker_screener': ticker_screener,
+            'version': version,
+            'built_at': time.time(),
+            'checked_at': time.time(),
+        }
+        self._ticker_index = self._build_ticker_index(subset)
+        self._ticker_screener = ticker_screener
+        self._universe_ready.set()
+        return True
+
+
+    async def refresh_universe(self, max_screeners: int = None) -> bool:
+        '''
+        One incremental refresh step: refetches up to max_screeners stale
+        screeners (all of them while no universe exists yet), rebuilds the
+        universe and persists it when it changed. A failed screener keeps
+        its previous members and is retried on the next step.
+        '''
+        screener_ids = await self._run_yahoo(self._current_screener_ids)
+        stale = self._stale_screeners(screener_ids)
+        if self._universe is not None:
+            stale = stale[:max_screeners or self.universe_screeners_per_tick]
+
+        removed = set(self._screener_members) - set(screener_ids)
+        for screener_id in removed:
+            del self._screener_members[screener_id]
+
+        if stale:
+            logger.info(f"[Universe] Refreshing {len(stale)} screeners: {stale}")
+            results = await asyncio.gather(*(self._fetch_screener(sid) for sid in stale))
+            for screener_id, tickers in zip(stale, results):
+                if tickers is not None:
+                    self._screener_members[screener_id] = {'tickers': tickers, 'refreshed_at': time.time()}
+
+        changed = await self._rebuild_universe()
+        if changed:
+            snapshot = json.dumps({'screener_members': self._screener_members}).encode('utf-8')
+            await asyncio.to_thread(self._write_universe_snapshot, snapshot)
+            logger.info(
+                f"[Universe] New snapshot {self._universe['version']}: "
+                f"{len(self._universe['companies'])} companies, {len(self._universe['screeners'])} screeners"
+            )
+        return changed
+
+
+    async def _universe_loop(self):
+        await self.load_universe_snapshot()
+        while True:
+            self._universe_refreshing = True
+            try:
+                await self.refresh_universe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"[Universe] Refresh step failed: {e}")
+            finally:
+                self._universe_refreshing = False
+            await asyncio.sleep(self.universe_refresh_tick)
+
+
+    def start_universe_refresher(self) -> asyncio.Task:
+        if self._universe_task is None or self._universe_task.done():
+            self._universe_task = asyncio.create_task(self._universe_loop())
+        return self._universe_task
+
+
+    async def stop_universe_refresher(self):
+        if self._universe_task is not None:
+            self._universe_task.cancel()
+            try:
+                await self._universe_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._universe_task = None
+
+
+    def universe_status(self) -> dict:
+        now = time.time()
+        refreshed = [member['refreshed_at'] for member in self._screener_members.values()]
+        universe = self._universe or {}
+        return {
+            "ready": self._universe_ready.is_set(),
+            "refreshing": self._universe_refreshing,
+            "version": universe.get('version'),
+            "companies": len(universe['companies']) if universe else 0,
+            "screeners": len(self._screener_members),
+            "stale_screeners": sum(now - t >= self.universe_refresh_interval for t in refreshed),
+            "oldest_screener_age_seconds": round(now - min(refreshed), 1) if refreshed else None,
+            "built_at": universe.get('built_at'),
+            "checked_at": universe.get('checked_at'),
+            "refresh_interval_seconds": self.universe_refresh_interval,
+        }
+
+
+    def _build_ticker_index(self, companies: pd.DataFrame) -> dict:
+        return {
+            ticker: (str(cik).zfill(10), title)
+            for ticker, cik, title in zip(companies['ticker'], companies['cik_str'], companies['title'])
+        }
+
+
+    async def lookup_company(self, ticker: str) -> tuple[str, str] | None:
+        '''
+        O(1) ticker -> (zero padded cik, title) lookup in the index that
+        the universe refresher keeps up to date. Until a universe exists,
+        the index is seeded from the full SEC ticker table.
+        '''
+        if not self._ticker_index:
+            company_ids = await self.fetch_company_cik_ticker_title()
+            if not company_ids.empty:
+                self._ticker_index = self._build_ticker_index(company_ids)
+        return self._ticker_index.get(ticker)
+
+
+    async def _run_yahoo(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._yahoo_executor, func, *args)
+
+
+    async def _load_company_news(self, selected_ticker, previous: CacheEntry = None):
+        news = await self._run_yahoo(lambda: yf.Ticker(selected_ticker).get_news())
+        return news, len(json.dumps(news, default=str)), {}
 
 
     async def get_company_news(self, selected_ticker)->json:
         try:    
             if not selected_ticker:
                 raise ValueError(f"Fund '{selected_ticker}' not found.")
-            news = yf.Ticker(selected_ticker).get_news()
+            news = await self.news_cache.get_or_load(
+                selected_ticker,
+                lambda previous: self._load_company_news(selected_ticker, previous)
+            )
             return news        
         except Exception as e:
             print(f"Failed 'fetch_stock_data_yf': {e}")
@@ -162,14 +851,22 @@ class API_Fetcher:
         self,
         selected_ticker: str,
         period: str = "10y",
-        interval: str = "1mo"
+        interval: str = "1mo",
+        start: str = None
     ) -> dict[str, any]:
+        '''
+        Close prices of one ticker. With start (YYYY-MM-DD) only the range
+        from start until today is fetched and period is ignored.
+        '''
         if not selected_ticker:
             raise ValueError("Ticker symbol must be provided.")
         
         def _worker() -> dict[str, any]:
             t = yq.Ticker(selected_ticker)
-            hist_df = t.history(period=period, interval=interval)
+            if start:
+                hist_df = t.history(interval=interval, start=start)
+            else:
+                hist_df = t.history(period=period, interval=interval)
 
             price_series = None
             if isinstance(hist_df, pd.DataFrame) and not hist_df.empty and "close" in hist_df.columns:
@@ -181,105 +878,297 @@ class API_Fetcher:
             return {"price_history": price_series}
 
         try:
-            return await asyncio.to_thread(_worker)
+            return await self._run_yahoo(_worker)
         except Exception as exc:
             logger.error("fetch_selected_stock_history_yq failed: %s", exc, exc_info=True)
             return {"error": str(exc)}
 
 
-    async def fetch_selected_stock_facts_yq(self, selected_ticker: str) -> dict[str, any]:
-        symbol = selected_ticker
-        if not symbol:
-            raise ValueError("Ticker symbol must be provided.")
-        
+    @staticmethod
+    def _columnar_history(hist: pd.DataFrame) -> dict[str, dict[str, list]]:
+        '''
+        Splits a multi-symbol yahooquery history frame (index symbol, date)
+        into {ticker: {"dates": [...], "close": [...]}} in one groupby.
+        '''
+        if not isinstance(hist, pd.DataFrame) or hist.empty or "close" not in hist.columns:
+            return {}
+        frame = hist[["close"]].dropna().reset_index()
+        if "symbol" not in frame.columns:
+            return {}
+        # yahooquery mixes datetime.date and Timestamp in one column
+        frame["date"] = pd.to_datetime(frame["date"].astype(str), utc=True, format="mixed")
+        return {
+            symbol: {
+                "dates": group["date"].dt.strftime("%Y-%m-%dT%H:%M:%SZ").tolist(),
+                "close": group["close"].astype(float).tolist(),
+            }
+            for symbol, group in frame.groupby("symbol", sort=False)
+        }
+
+
+    async def fetch_stock_history_batch_yq(
+        self,
+        tickers: list[str],
+        period: str = "10y",
+        interval: str = "1mo",
+        chunk_size: int = 100,
+        start: str = None
+    ) -> dict[str, dict[str, any]]:
+        '''
+        Price history for many symbols: each chunk is a single multi-symbol
+        yahooquery history() call, chunks run concurrently. Returns
+        {ticker: {"dates": [...], "close": [...]}} (UTC ISO dates), with
+        {"error": ...} for symbols Yahoo had no history for. With start
+        (YYYY-MM-DD) only the range since start is fetched.
+        '''
+        symbols = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+        if not symbols:
+            return {}
+
+        def _worker(chunk: list[str]) -> dict[str, any]:
+            t = yq.Ticker(chunk, asynchronous=True)
+            if start:
+                hist = t.history(interval=interval, start=start)
+            else:
+                hist = t.history(period=period, interval=interval)
+            if isinstance(hist, pd.DataFrame):
+                return self._columnar_history(hist)
+
+            # with failing symbols yahooquery returns {symbol: frame or error}
+            history = {}
+            for symbol, data in (hist or {}).items():
+                if isinstance(data, pd.DataFrame):
+                    if "symbol" not in data.index.names:
+                        data = pd.concat({symbol: data}, names=["symbol"])
+                    history.update(self._columnar_history(data))
+                else:
+                    history[symbol] = {"error": str(data)}
+            return history
+
+        async def fetch_chunk(chunk: list[str]) -> dict[str, any]:
+            async with self._semaphore:
+                try:
+                    return await self._run_yahoo(_worker, chunk)
+                except Exception as exc:
+                    logger.error(f"[HistoryBatch] Chunk of {len(chunk)} symbols failed: {exc}")
+                    return {symbol: {"error": str(exc)} for symbol in chunk}
+
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+        results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+
+        history = {}
+        for data in results:
+            history.update(data)
+        for symbol in symbols:
+            history.setdefault(symbol, {"error": "No data returned"})
+
+        logger.info(f"[HistoryBatch] Fetched {interval} history for {len(symbols)} symbols in {len(chunks)} chunks")
+        return history
+
+
+    def _build_stock_facts(self, symbol: str, modules: dict, news_block=None) -> dict[str, any]:
+        prof = modules.get("summaryProfile") or {}
+        det  = modules.get("summaryDetail") or {}
+        fin  = modules.get("financialData") or {}
+        ks   = modules.get("defaultKeyStatistics") or {}
+
+        return {
+            # --- identification ---
+            "ticker":           symbol,
+            "company_name":     prof.get("longBusinessSummary"),  
+            "sector":           prof.get("sector"),
+            "industry":         prof.get("industry"),
+            "website":          prof.get("website"),
+            "employees":        prof.get("fullTimeEmployees"),
+
+            # --- market metrics ---
+            "current_price":    fin.get("currentPrice"),
+            "market_cap":       det.get("marketCap"),
+            "beta":             ks.get("beta"),
+            "volume":           det.get("volume"),
+
+            # --- valuation ---
+            "trailing_pe":      det.get("trailingPE"),
+            "forward_pe":       ks.get("forwardPE"),
+            "price_to_book":    ks.get("priceToBook"),
+
+            # --- dividends ---
+            "dividend_yield":   det.get("dividendYield"),
+            "dividend_rate":    det.get("dividendRate"),
+            "ex_dividend":      det.get("exDividendDate"),
+
+            # --- performance ---
+            "52w_high":         det.get("fiftyTwoWeekHigh"),
+            "52w_low":          det.get("fiftyTwoWeekLow"),
+            "52w_change_pct":   ks.get("52WeekChange"),
+
+            # --- analyst targets ---
+            "target_mean":      fin.get("targetMeanPrice"),
+            "target_high":      fin.get("targetHighPrice"),
+            "target_low":       fin.get("targetLowPrice"),
+            "recommendation_mean": fin.get("recommendationMean"),
+
+            # --- cash & leverage ---
+            "total_cash":       fin.get("totalCash"),
+            "total_debt":       fin.get("totalDebt"),
+            "debt_to_equity":   fin.get("debtToEquity"),
+            "current_ratio":    fin.get("currentRatio"),
+            "quick_ratio":      fin.get("quickRatio"),
+
+            # --- margins & returns ---
+            "gross_margins":    fin.get("grossMargins"),
+            "operating_margins":fin.get("operatingMargins"),
+            "profit_margins":   fin.get("profitMargins"),
+            "roa":              fin.get("returnOnAssets"),
+            "roe":              fin.get("returnOnEquity"),
+            "eps_forward":      ks.get("forwardEps") or fin.get("forwardEps"),
+            "revenue_growth":   fin.get("revenueGrowth"),
+
+            # --- news ---
+            "news":             news_block,    
+        }
+
+
+    async def _load_stock_facts(self, symbol: str, previous: CacheEntry = None):
         def _worker() -> dict[str, any]:
             t = yq.Ticker(symbol)
 
-            # -- blocks come back as {symbol: {...}}
-            prof = (t.summary_profile or {}).get(symbol, {})
-            det  = (t.summary_detail  or {}).get(symbol, {})
-            fin  = (t.financial_data  or {}).get(symbol, {})
-            ks   = (t.key_stats       or {}).get(symbol, {})
-
-            news_block = yf.Ticker(symbol).get_news()
-
-            return {
-                # --- identification ---
-                "ticker":           symbol,
-                "company_name":     prof.get("longBusinessSummary"),  
-                "sector":           prof.get("sector"),
-                "industry":         prof.get("industry"),
-                "website":          prof.get("website"),
-                "employees":        prof.get("fullTimeEmployees"),
-
-                # --- market metrics ---
-                "current_price":    fin.get("currentPrice"),
-                "market_cap":       det.get("marketCap"),
-                "beta":             ks.get("beta"),
-                "volume":           det.get("volume"),
-
-                # --- valuation ---
-                "trailing_pe":      det.get("trailingPE"),
-                "forward_pe":       ks.get("forwardPE"),
-                "price_to_book":    ks.get("priceToBook"),
-
-                # --- dividends ---
-                "dividend_yield":   det.get("dividendYield"),
-                "dividend_rate":    det.get("dividendRate"),
-                "ex_dividend":      det.get("exDividendDate"),
-
-                # --- performance ---
-                "52w_high":         det.get("fiftyTwoWeekHigh"),
-                "52w_low":          det.get("fiftyTwoWeekLow"),
-                "52w_change_pct":   ks.get("52WeekChange"),
-
-                # --- analyst targets ---
-                "target_mean":      fin.get("targetMeanPrice"),
-                "target_high":      fin.get("targetHighPrice"),
-                "target_low":       fin.get("targetLowPrice"),
-                "recommendation_mean": fin.get("recommendationMean"),
-
-                # --- cash & leverage ---
-                "total_cash":       fin.get("totalCash"),
-                "total_debt":       fin.get("totalDebt"),
-                "debt_to_equity":   fin.get("debtToEquity"),
-                "current_ratio":    fin.get("currentRatio"),
-                "quick_ratio":      fin.get("quickRatio"),
-
-                # --- margins & returns ---
-                "gross_margins":    fin.get("grossMargins"),
-                "operating_margins":fin.get("operatingMargins"),
-                "profit_margins":   fin.get("profitMargins"),
-                "roa":              fin.get("returnOnAssets"),
-                "roe":              fin.get("returnOnEquity"),
-                "eps_forward":      ks.get("forwardEps") or fin.get("forwardEps"),
-                "revenue_growth":   fin.get("revenueGrowth"),
-
-                # --- news ---
-                "news":             news_block,    
-            }
+            # -- all four modules in one quoteSummary call: {symbol: {module: {...}}}
+            answer = t.get_modules(STOCK_FACT_MODULES) or {}
+            modules = answer.get(symbol) if isinstance(answer, dict) else answer
+            # rate limits and unknown symbols come back as an error string; raising
+            # fails the load, so the facts cache never keeps an all-None answer
+            if not isinstance(modules, dict):
+                raise ValueError(f"Yahoo returned no modules for {symbol}: {modules}")
+
+            # news is cached separately and merged in fetch_selected_stock_facts_yq
+            return self._build_stock_facts(symbol, modules)
 
         # run the heavy work in a thread so the coroutine stays non-blocking
+        facts = await self._run_yahoo(_worker)
+        return facts, len(json.dumps(facts, default=str)), {}
+
+
+    async def fetch_selected_stock_facts_yq(self, selected_ticker: str) -> dict[str, any]:
+        '''
+        Company facts served through the facts cache, so the company page,
+        the analysis pipeline and the forecasting service asking for the same
+        ticker within the TTL share one Yahoo round trip. The news block comes
+        from the news cache, the same one /company-news reads, so a page load
+        fetches the news only once.
+        '''
+        symbol = selected_ticker
+        if not symbol:
+            raise ValueError("Ticker symbol must be provided.")
+
         try:
-            return await asyncio.to_thread(_worker)
+            facts, news_block = await asyncio.gather(
+                self.facts_cache.get_or_load(
+                    symbol,
+                    lambda previous: self._load_stock_facts(symbol, previous)
+                ),
+                self.get_company_news(symbol)
+            )
+            return {**facts, "news": news_block}
         except Exception as exc:
             logger.error("get_yq failed: %s", exc, exc_info=True)
             return {"error": str(exc)}
 
 
+    async def fetch_stock_facts_batch_yq(self, tickers: list[str], chunk_size: int = 100) -> dict[str, dict[str, any]]:
+        '''
+        Company facts for many symbols at once. Each chunk is a single
+        multi-symbol yahooquery Ticker that pulls all four modules per
+        symbol; chunks run concurrently. News is not part of the batch.
+        Returns {ticker: facts} with {"error": ...} for failed symbols.
+        '''
+        symbols = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+        if not symbols:
+            return {}
+
+        def _worker(chunk: list[str]) -> dict[str, any]:
+            t = yq.Ticker(chunk, asynchronous=True)
+            return t.get_modules(STOCK_FACT_MODULES) or {}
+
+        async def fetch_chunk(chunk: list[str]) -> dict[str, any]:
+            async with self._semaphore:
+                try:
+                    return await self._run_yahoo(_worker, chunk)
+                except Exception as exc:
+                    logger.error(f"[FactsBatch] Chunk of {len(chunk)} symbols failed: {exc}")
+                    return {symbol: str(exc) for symbol in chunk}
+
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+        results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+
+        facts = {}
+        for data in results:
+            for symbol, modules in data.items():
+                if isinstance(modules, dict):
+                    facts[symbol] = self._build_stock_facts(symbol, modules)
+                else:
+                    facts[symbol] = {"error": str(modules)}
+        for symbol in symbols:
+            facts.setdefault(symbol, {"error": "No data returned"})
+
+        logger.info(f"[FactsBatch] Fetched facts for {len(symbols)} symbols in {len(chunks)} chunks")
+        return facts
+
+
+    async def _load_submissions(self, selected_cik, previous: CacheEntry = None):
+        '''
+        Loader for the submissions cache: revalidates with the stored
+        ETag/Last-Modified and returns None on 304 so nothing is re-parsed.
+        '''
+        headers = {}
+        if previous is not None:
+            if previous.validators.get('etag'):
+                headers['If-None-Match'] = previous.validators['etag']
+            if previous.validators.get('last_modified'):
+                headers['If-Modified-Since'] = previous.validators['last_modified']
+
+        response = await self._sec_get(f'https://data.sec.gov/submissions/CIK{selected_cik}.json', headers=headers)
+        if response.status_code == 304 and previous is not None:
+            return None
+        response.raise_for_status()
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        filing_dict = response.json()
+        filing_index = FilingIndex.from_submissions(filing_dict.get('filings', {}))
+        return (filing_dict, filing_index), len(response.content), validators
+
+
+    async def _get_submissions(self, selected_cik) -> tuple[dict, FilingIndex]:
+        cached = await self.submissions_cache.get_or_load(
+            str(selected_cik),
+            lambda previous: self._load_submissions(selected_cik, previous)
+        )
+        return cached if cached is not None else ({}, FilingIndex())
+
+
+    async def get_filing_index(self, selected_cik, include_history: bool = False) -> FilingIndex:
+        '''
+        Returns the columnar filing index cached next to the submissions.
+        With include_history the older pages in filings['files'] are pulled
+        once and appended, so lookups can reach beyond 'recent'.
+        '''
+        filing_dict, filing_index = await self._get_submissions(selected_cik)
+        if include_history:
+            for page in filing_dict.get('filings', {}).get('files', []):
+                name = page.get('name')
+                if not name or name in filing_index.loaded_pages:
+                    continue
+                response = await self._sec_get(f'https://data.sec.gov/submissions/{name}')
+                response.raise_for_status()
+                filing_index.extend(name, response.json())
+        return filing_index
+
+
     async def fetch_selected_company_details_and_filing_accessions(self, selected_cik)->tuple[dict[str, any], dict[str, any], dict[str, any]]:
         try:
-            USER_AGENT_SEC = os.getenv('USER_AGENT_SEC', 'default-agent')
-            headers = {'User-Agent': USER_AGENT_SEC}
-
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f'https://data.sec.gov/submissions/CIK{selected_cik}.json',
-                    headers=headers,
-                    timeout = None
-                )
-                response.raise_for_status()
-                filing_dict = response.json()
+            filing_dict, _ = await self._get_submissions(selected_cik)
 
             if filing_dict:
                 important_keys = [
@@ -304,53 +1193,62 @@ class API_Fetcher:
             return {}, {}, {}
 
 
-    def get_latest_filings_index(self, filings:dict=None)->dict:
-        mapping_latest_forms_doc_index = {}
+    def get_latest_filings_index(self, filings:dict=None, filing_index:FilingIndex=None)->dict:
         important_forms = ['10-K', '10-Q', '8-K', 'S-1', 'S-3', 'DEF 14A', '20-F', '6-K', '4', '13D', '13G']
-        for form in important_forms:
-            for index, row in enumerate(filings['recent']['form']):
-                if str(row) == form:
-                    mapping_latest_forms_doc_index[form] = index
-                    break
-        return mapping_latest_forms_doc_index
+        if filing_index is None:
+            filing_index = FilingIndex.from_submissions(filings)
+        return filing_index.latest_by_forms(important_forms)
     
     
     def create_base_df_for_sec_company_data(self,mapping_latest_docs:dict=None,
-                                            filings:dict=None, cik:str=None)->pd.DataFrame:
-        last_accession_numbers = []
-        report_dates = []
-        forms = []
-        primary_docs = []
-        idxs = []
-
-        for form, index in mapping_latest_docs.items():
-            last_accession_numbers.append(filings['recent']['accessionNumber'][index].replace('-', ''))
-            report_dates.append(filings['recent']['reportDate'][index])
-            forms.append(filings['recent']['form'][index])
-            primary_docs.append(filings['recent']['primaryDocument'][index])
-            idxs.append(index)
+                                            filings:dict=None, cik:str=None,
+                                            filing_index:FilingIndex=None)->pd.DataFrame:
+        if filing_index is None:
+            filing_index = FilingIndex.from_submissions(filings)
+
+        idxs = list(mapping_latest_docs.values())
+        rows = filing_index.rows(idxs)
 
         base_sec_df = pd.DataFrame({
-            'accession_number': last_accession_numbers,
-            'report_date': report_dates,
-            'form': forms,
-            'docs': primary_docs,
-            'cik': [cik] * len(forms),
+            'accession_number': rows['accessionNumber'].str.replace('-', '', regex=False),
+            'report_date': rows['reportDate'],
+            'form': rows['form'],
+            'docs': rows['primaryDocument'],
+            'cik': [cik] * len(rows),
             'index': str(idxs)
         })
         return base_sec_df
         
         
+    async def _cache_put(self, cache: DiskCache, key: str, data: bytes):
+        '''
+        Disk cache write that never fails the caller: the content is
+        already in hand, a full disk or a write error only costs the
+        cache entry.
+        '''
+        try:
+            await asyncio.to_thread(cache.put, key, data)
+        except OSError as e:
+            logger.warning(f"[DiskCache] Writing '{key}' to {cache.directory} failed: {e}")
+
+
     async def _fetch_selected_company_filings(self, cik, accession, filename) -> bytes:
+        '''
+        Published filings never change, so (cik, accession, filename) is
+        looked up in the disk cache before EDGAR is asked.
+        '''
+        cache_key = f"{cik}/{accession}/{filename}"
         try:
-            USER_AGENT_SEC = os.getenv('USER_AGENT_SEC', 'default-agent')
-            headers = {'User-Agent': USER_AGENT_SEC}
-            url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession}/{filename}"
+            cached = await asyncio.to_thread(self.filing_cache.get, cache_key)
+            if cached is not None:
+                return cached
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=headers, timeout=None)
-                response.raise_for_status()
-                return response.content
+            url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession}/{filename}"
+            response = await self._sec_get(url)
+            response.raise_for_status()
+            if response.content:
+                await self._cache_put(self.filing_cache, cache_key, response.content)
+            return response.content
 
         except httpx.HTTPStatusError as e:
             print(f"HTTP error: {e}")
@@ -362,17 +1260,6 @@ class API_Fetcher:
         return b""
 
 
-    async def fetch_all_filings(self, base_sec_df: pd.DataFrame=None) -> pd.Series:
-        all_filings = []
-        for _, row in base_sec_df.iterrows():
-            filings_dict = await self._fetch_selected_company_filings(cik=str(int(row['cik'])), accession=row['accession_number'], filename=row['docs'])
-            all_filings.append(filings_dict)
-        if all_filings:
-            print('Files successfully fetched from SEC.gov')
-
-        return pd.Series(all_filings)
-                
-
     def preclean_for_llm(self, text: str = None) -> str:
         '''
         This function parses the raw html content for the llm input
@@ -397,95 +1284,218 @@ class API_Fetcher:
         return cleaned_text.strip()
 
 
-    async def preprocess_docs_content(self, series: pd.Series) -> pd.Series:
+    def resolve_sections(self, sections: list[str] = None) -> tuple[str, ...] | None:
         '''
-        This function turns the raw html to markdown
+        Sections to extract from 10-K/10-Q/20-F filings: the given ones,
+        else FILING_SECTIONS. None (via "all" or an empty list) means
+        whole documents.
         '''
-        series = series.copy()
-        cleaned_series = pd.Series(index=series.index, dtype=object)
+        if sections is None:
+            sections = self.filing_sections.split(',')
+        sections = tuple(sorted({s.strip().lower() for s in sections if s and s.strip()}))
+        if not sections or 'all' in sections:
+            return None
+        return sections
 
-        async def process_row(index):
-            raw_content = series.at[index]
 
-            try:
-                html_stream = DocumentStream(name=f'sec_{index}', stream=BytesIO(raw_content))
-                converter = DocumentConverter()
-                result = converter.convert(html_stream)
-                cleaned_series.at[index] = result.document.export_to_markdown()
-                print(f'[docling] Parsed row {index}')
-                return
-            except Exception as e:
-                print(f'[docling] Failed at row {index}: {e}')
-                return
+    async def _convert_document(self, index, raw_content: bytes, cache_key: str = None,
+                                form: str = None, sections: tuple[str, ...] = None) -> str:
+        '''
+        Converts one raw filing to markdown with the configured engine
+        (CONVERSION_ENGINE) in the docling process pool,
+        going through the markdown cache when a cache_key is given.
+        For forms with item structure only the given sections are
+        converted (see filing_sections). Returns None when the document
+        was skipped or failed.
+        '''
+        if section_form(form) is None:
+            sections = None
+        if cache_key:
+            cache_key = f"{cache_key}|{self._conversion_fingerprint}"
+            if sections:
+                cache_key = f"{cache_key}|{','.join(sections)}"
+            cached = await asyncio.to_thread(self.markdown_cache.get, cache_key)
+            if cached is not None:
+                print(f'[docling] Served row {index} from markdown cache')
+                return cached.decode('utf-8')
+
+        if not raw_content:
+            print(f'[docling] No content at row {index}')
+            return None
+        if len(raw_content) > self.docling_max_doc_bytes:
+            print(f'[docling] Skipped row {index}: {len(raw_content)} bytes exceeds limit')
+            return None
 
-        tasks = [process_row(index) for index in series.index]
-        await asyncio.gather(*tasks)
-        
-        return cleaned_series
+        try:
+            markdown = await self._run_conversion(index, raw_content, form, sections)
+            if cache_key and markdown:
+                await self._cache_put(self.markdown_cache, cache_key, markdown.encode('utf-8'))
+            print(f'[docling] Parsed row {index}' + (f" ({form}: {', '.join(sections)})" if sections else ''))
+            return markdown
+        except TimeoutError as e:
+            print(f'[docling] Timed out at row {index}: {e}')
+        except BrokenProcessPool as e:
+            print(f'[docling] Worker crashed at row {index}: {e}')
+        except Exception as e:
+            print(f'[docling] Failed at row {index}: {e}')
+        return None
 
 
-    async def preprocess_and_pull_context_sec_yf(self, ticker: str = None):
+    async def _run_conversion(self, index, raw_content: bytes, form: str = None,
+                              sections: tuple[str, ...] = None) -> str:
+        '''
+        Runs one conversion in the docling pool. The worker stops it
+        itself after docling_timeout; a worker that has not answered
+        docling_kill_grace later is stuck in native code and its pool is
+        recycled to get the slot back. A conversion that lost its pool to
+        a recycle started by another task is resubmitted once.
+        '''
+        for attempt in range(2):
+            pool = self.start_docling_pool()
+            future = asyncio.get_running_loop().run_in_executor(
+                pool, convert_html_to_markdown, f'sec_{index}', raw_content,
+                self.conversion_engine, form, list(sections) if sections else None, self.docling_timeout
+            )
+            try:
+                done, _ = await asyncio.wait({future}, timeout=self.docling_timeout + self.docling_kill_grace)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+
+            if not done:
+                future.cancel()
+                self._recycle_docling_pool(pool, f"row {index} did not return within {self.docling_timeout}s")
+                raise TimeoutError(f"worker did not return after {self.docling_timeout + self.docling_kill_grace}s")
+
+            # a cancelled future means the pool was shut down with the conversion queued
+            if future.cancelled() or isinstance(future.exception(), BrokenProcessPool):
+                if self._recycle_docling_pool(pool, f"worker crashed at row {index}"):
+                    raise BrokenProcessPool(f"pool broke while converting row {index}")
+                if attempt == 0 and self._docling_pool is not None:
+                    continue
+                raise BrokenProcessPool(f"pool went away while converting row {index}")
+            return future.result()
+
+
+    async def preprocess_and_pull_context_sec_yf(self, ticker: str = None, emit: Callable[[dict], None] = None,
+                                                 sections: list[str] = None):
+        '''
+        Builds the company context. After the ticker lookup the Yahoo branch
+        (step 2) and the SEC branch (steps 3-6) run concurrently, and inside
+        the SEC branch every filing goes to docling as soon as its own
+        download is done. Step timings are logged as before, followed by a
+        timeline that shows how much the stages overlapped.
+        With emit, every stage result is also handed over as a record the
+        moment it is ready (see stream_company_context).
+        10-K/10-Q/20-F filings are converted only for the requested
+        sections (default FILING_SECTIONS, ["all"] for whole documents);
+        raw_content always stays the complete filing.
+        '''
         all_data = {}
+        timeline = {}
+        pipeline_start = time.time()
+        emit = emit or (lambda record: None)
+        sections = self.resolve_sections(sections)
+
+        def record(stage: str, started: float):
+            timeline[stage] = (started - pipeline_start, time.time() - pipeline_start)
 
         try:
             # Step 1: Validate & find ticker
             task_1 = time.time()
-            async with httpx.AsyncClient() as client:
-                response = await client.get("http://api-gateway:8000/companies-df", timeout=None)
-                all_companies = response.json()
-                all_companies_df = pd.DataFrame(all_companies)
-            logger.info(f"[{ticker}] Step 1 - Fetched company data ({len(all_companies_df)} rows) - {time.time() - task_1:.2f}s")
-            logger.info(f"[{ticker}] - Company df ({all_companies_df.head()}")
-            datapoint = all_companies_df[all_companies_df['ticker'] == ticker]
-
-            if datapoint.empty:
+            company = await self.lookup_company(ticker)
+            logger.info(f"[{ticker}] Step 1 - Looked up company ({len(self._ticker_index)} indexed) - {time.time() - task_1:.2f}s")
+            record('step_1_lookup', task_1)
+
+            if company is None:
                 raise ValueError(f"Ticker '{ticker}' not found in company data.")
 
-            row = datapoint.iloc[0]
             all_data['ticker'] = ticker
-            all_data['cik'] = str(row["cik_str"]).zfill(10)
-            all_data['company_title'] = row["title"]
-
-            # Step 2: Fetch Yahoo Finance Data
-            task_2 = time.time()
-            yf_data = await self.fetch_selected_stock_facts_yq(selected_ticker=ticker)
-            all_data['yf_stock_data'] = yf_data
-            logger.info(f"[{ticker}] Step 2 - Fetched Yahoo Finance data - {time.time() - task_2:.2f}s")
-
-            # Step 3: Fetch SEC company identification
-            task_3 = time.time()
-            details_1, details_2, filing_accessions = await self.fetch_selected_company_details_and_filing_accessions(
-                selected_cik=all_data['cik']
-            )
-            logger.info(f"[{ticker}] Step 3 - Fetched SEC filings - {time.time() - task_3:.2f}s")
-            all_data['sec_details_1'] = details_1
-            all_data['sec_details_2'] = details_2
-            all_data['filing_accessions'] = filing_accessions
-
-            # Step 4: Map latest documents (latest docs)
-            task_4 = time.time()
-            all_data['mapping_latest_docs'] = self.get_latest_filings_index(filings=all_data['filing_accessions'])
-            logger.info(f"[{ticker}] Step 4 - Get SEC documents index - {time.time() - task_4:.2f}s")
-
-            all_data['base_sec_df'] = self.create_base_df_for_sec_company_data(
-                mapping_latest_docs=all_data['mapping_latest_docs'],
-                filings=all_data['filing_accessions'],
-                cik=all_data['cik']
-            )
-
-            # Step 5: Fetch all latest reports
-            task_5 = time.time()
-            docs_content_series = await self.fetch_all_filings(base_sec_df=all_data['base_sec_df'])
-            logger.info(f"[{ticker}] Step 5 - Fetch SEC documents - {time.time() - task_5:.2f}s")
-
-            # Step 6: Preprocess documents
-            task_6 = time.time()
-            docs_content_series_1 = await self.preprocess_docs_content(series=docs_content_series)
-            logger.info(f"[{ticker}] Step 6 - Preprocess SEC documents - {time.time() - task_6:.2f}s")
-
-            all_data['base_sec_df']['raw_content'] = docs_content_series
-            all_data['base_sec_df']['content'] = docs_content_series_1
-            all_data['base_sec_df'] = all_data['base_sec_df'].replace({np.nan: None, np.inf: None, -np.inf: None})
+            all_data['cik'], all_data['company_title'] = company
+            emit({"type": "company", "ticker": ticker, "cik": all_data['cik'], "company_title": all_data['company_title']})
+
+            async def yahoo_branch():
+                # Step 2: Fetch Yahoo Finance Data
+                task_2 = time.time()
+                yf_data = await self.fetch_selected_stock_facts_yq(selected_ticker=ticker)
+                all_data['yf_stock_data'] = yf_data
+                emit({"type": "yf_stock_data", "data": yf_data})
+                record('step_2_yahoo', task_2)
+                logger.info(f"[{ticker}] Step 2 - Fetched Yahoo Finance data - {time.time() - task_2:.2f}s")
+
+            async def sec_branch():
+                # Step 3: Fetch SEC company identification
+                task_3 = time.time()
+                details_1, details_2, filing_accessions = await self.fetch_selected_company_details_and_filing_accessions(
+                    selected_cik=all_data['cik']
+                )
+                record('step_3_sec_submissions', task_3)
+                logger.info(f"[{ticker}] Step 3 - Fetched SEC filings - {time.time() - task_3:.2f}s")
+                all_data['sec_details_1'] = details_1
+                all_data['sec_details_2'] = details_2
+                all_data['filing_accessions'] = filing_accessions
+
+                # Step 4: Map latest documents (latest docs)
+                task_4 = time.time()
+                filing_index = await self.get_filing_index(all_data['cik'])
+                all_data['mapping_latest_docs'] = self.get_latest_filings_index(filing_index=filing_index)
+                record('step_4_index', task_4)
+                logger.info(f"[{ticker}] Step 4 - Get SEC documents index - {time.time() - task_4:.2f}s")
+
+                base_sec_df = self.create_base_df_for_sec_company_data(
+                    mapping_latest_docs=all_data['mapping_latest_docs'],
+                    cik=all_data['cik'],
+                    filing_index=filing_index
+                )
+                emit({
+                    "type": "sec_metadata",
+                    "data": {
+                        "sec_details_1": details_1,
+                        "sec_details_2": details_2,
+                        "filings": base_sec_df.to_dict(orient='records'),
+                    }
+                })
+
+                # Step 5 + 6: Fetch every report and convert it as soon as it arrives
+                task_5 = time.time()
+                downloads_done = []
+                conversions_done = []
+
+                async def fetch_and_convert(index, cik, accession, filename, form):
+                    raw_content = await self._fetch_selected_company_filings(
+                        cik=str(int(cik)), accession=accession, filename=filename
+                    )
+                    downloads_done.append(time.time())
+                    content = await self._convert_document(index, raw_content, f"{accession}/{filename}", form, sections)
+                    conversions_done.append(time.time())
+                    emit({
+                        "type": "filing",
+                        "index": int(index),
+                        "data": {**base_sec_df.loc[index].to_dict(), "raw_content": raw_content, "content": content},
+                    })
+                    return raw_content, content
+
+                results = await asyncio.gather(*[
+                    fetch_and_convert(index, cik, accession, filename, form)
+                    for index, cik, accession, filename, form in zip(
+                        base_sec_df.index, base_sec_df['cik'], base_sec_df['accession_number'],
+                        base_sec_df['docs'], base_sec_df['form']
+                    )
+                ])
+                downloads_end = max(downloads_done, default=task_5)
+                conversions_end = max(conversions_done, default=task_5)
+                timeline['step_5_download'] = (task_5 - pipeline_start, downloads_end - pipeline_start)
+                timeline['step_6_docling'] = (min(downloads_done, default=task_5) - pipeline_start, conversions_end - pipeline_start)
+                logger.info(f"[{ticker}] Step 5 - Fetch SEC documents - {downloads_end - task_5:.2f}s")
+                logger.info(f"[{ticker}] Step 6 - Preprocess SEC documents - {conversions_end - task_5:.2f}s (overlapping downloads)")
+
+                base_sec_df['raw_content'] = pd.Series([raw for raw, _ in results], index=base_sec_df.index, dtype=object)
+                base_sec_df['content'] = pd.Series([content for _, content in results], index=base_sec_df.index, dtype=object)
+                all_data['base_sec_df'] = base_sec_df.replace({np.nan: None, np.inf: None, -np.inf: None})
+
+            await asyncio.gather(yahoo_branch(), sec_branch())
+            self._log_pipeline_timeline(ticker, timeline, time.time() - pipeline_start)
+            emit({"type": "done", "timeline": timeline})
 
             final_dict = {}
 
@@ -497,47 +1507,136 @@ class API_Fetcher:
         except Exception as e:
             logger.error(f"[{ticker}] ERROR in preprocess_and_pull_context_sec_yf: {e}", exc_info=True)
             raise
- 
 
-    async def get_tickers_from_screeners_async(self, screener_ids: List[str]) -> Tuple[List[str], List[str]]:
+
+    def _context_key(self, ticker: str, sections: list[str] = None) -> str:
+        sections = self.resolve_sections(sections)
+        return f"{ticker}|{','.join(sections) if sections else 'all'}"
+
+
+    async def stream_company_context(self, ticker: str, sections: list[str] = None) -> AsyncIterator[dict]:
+        '''
+        Yields the company context as records (company, yf_stock_data,
+        sec_metadata, one filing per converted document, done) as soon as
+        each one is ready. Streams go through the same single-flight cache
+        as get_company_context: a finished context replays the records of
+        its run (the same record types and order as a live stream), a
+        running load is joined (records emitted so far first), otherwise a
+        new load is started and its result cached. Failures end the stream
+        with an error record.
+        '''
+        key = self._context_key(ticker, sections)
+        entry = self.context_cache.peek(key)
+        if key not in self._context_broadcasts and entry is not None \
+                and time.monotonic() - entry.stored_at < self.context_cache.ttl:
+            for record in entry.value['records']:
+                yield record
+            return
+
+        broadcast = self._context_broadcasts.setdefault(key, RecordBroadcast())
+        load = asyncio.ensure_future(self.get_company_context(ticker, sections))
+        # the load also fills the cache for others, its outcome reaches this stream as records
+        load.add_done_callback(lambda task: task.cancelled() or task.exception())
+        try:
+            async for record in broadcast.follow():
+                yield record
+        finally:
+            # the pipeline itself is shielded by the cache and keeps running
+            if not load.done():
+                load.cancel()
+
+
+    def _log_pipeline_timeline(self, ticker: str, timeline: dict, wall: float):
+        '''
+        Logs every stage as start-end offset from the pipeline start, the
+        sum of stage durations against the wall time (their difference is
+        what the overlap saved) and the stage that finished last, i.e. the
+        end of the critical path.
+        '''
+        spans = ", ".join(f"{stage} {start:.2f}-{end:.2f}s" for stage, (start, end) in timeline.items())
+        serial = sum(end - start for start, end in timeline.values())
+        critical = max(timeline, key=lambda stage: timeline[stage][1]) if timeline else None
+        logger.info(f"[{ticker}] Timeline - {spans}")
+        logger.info(
+            f"[{ticker}] Pipeline wall {wall:.2f}s vs serial {serial:.2f}s "
+            f"(overlap {max(serial - wall, 0.0):.2f}s), critical path ends in {critical}"
+        )
+
+
+    async def get_company_context(self, ticker: str, sections: list[str] = None) -> dict:
+        key = self._context_key(ticker, sections)
+
+        async def _loader(previous: CacheEntry = None):
+            # streams started or joined while this load runs follow its records
+            broadcast = self._context_broadcasts.setdefault(key, RecordBroadcast())
+            try:
+                context = await self.preprocess_and_pull_context_sec_yf(
+                    ticker=ticker, emit=broadcast.emit, sections=sections
+                )
+            except Exception as e:
+                broadcast.emit({"type": "error", "detail": str(e)})
+                raise
+            finally:
+                broadcast.finish()
+                if self._context_broadcasts.get(key) is broadcast:
+                    del self._context_broadcasts[key]
+            base_sec_df = context['base_sec_df']
+            size = sum(
+                len(v) for column in ('raw_content', 'content') if column in base_sec_df
+                for v in base_sec_df[column] if v
+            )
+            # the filing records share their raw_content/content objects with
+            # base_sec_df, keeping them for replays costs no extra filing bytes
+            return {'context': context, 'records': broadcast.records}, max(size, 1), {}
+
+        cached = await self.context_cache.get_or_load(key, _loader)
+        return cached['context']
+
+
+    async def _fetch_screener(self, screener_id: str) -> List[str] | None:
+        '''
+        Tickers of one Yahoo screener, or None when every attempt failed.
+        '''
+        async with self._semaphore:
+            for attempt in range(1, self.retry_attempts + 1):
+                try:
+                    logger.info(f"[ScreenerFetcher] Fetching screener '{screener_id}' (Attempt {attempt})")
+                    screener = Screener()
+                    results = await self._run_yahoo(screener.get_screeners, [screener_id])
+
+                    if not results:
+                        raise ValueError("Empty response from Yahoo Screener API")
+
+                    key = next(iter(results))
+                    quotes = results.get(key, {}).get("quotes", [])
+
+                    tickers = [q["symbol"] for q in quotes if "symbol" in q]
+                    return tickers
+
+                except Exception as e:
+                    logger.warning(f"[ScreenerFetcher] Attempt {attempt} failed for '{screener_id}': {e}")
+                    await asyncio.sleep(self.retry_delay)
+
+            logger.info(f"[ScreenerFetcher] All attempts failed for screener '{screener_id}'")
+            return None
+
+
+    async def get_tickers_from_screeners_async(self, screener_ids: List[str]) -> Tuple[List[str], List[str], List[tuple[str, str]]]:
         """
         Fetch tickers from multiple Yahoo screeners concurrently.
         Returns a tuple:
             - List of unique tickers
             - List of unique screeners (that successfully returned tickers)
+            - List of (screener, ticker) pairs
         """
         logger.info(f"[ScreenerFetcher] Starting to fetch tickers for screeners: {screener_ids}")
 
-        async def fetch(screener_id: str) -> List[str]:
-            async with self._semaphore:
-                for attempt in range(1, self.retry_attempts + 1):
-                    try:
-                        logger.info(f"[ScreenerFetcher] Fetching screener '{screener_id}' (Attempt {attempt})")
-                        screener = Screener()
-                        results = await asyncio.to_thread(screener.get_screeners, [screener_id])
-
-                        if not results:
-                            raise ValueError("Empty response from Yahoo Screener API")
-
-                        key = next(iter(results))
-                        quotes = results.get(key, {}).get("quotes", [])
-
-                        tickers = [q["symbol"] for q in quotes if "symbol" in q]
-                        return tickers
-
-                    except Exception as e:
-                        logger.warning(f"[ScreenerFetcher] Attempt {attempt} failed for '{screener_id}': {e}")
-                        await asyncio.sleep(self.retry_delay)
-
-                logger.info(f"[ScreenerFetcher] All attempts failed for screener '{screener_id}'")
-                return []
-
-        all_results = await asyncio.gather(*(fetch(sid) for sid in screener_ids))
+        all_results = await asyncio.gather(*(self._fetch_screener(sid) for sid in screener_ids))
 
         ticker_screener = [
             (screener_id, ticker)
             for screener_id, tickers in zip(screener_ids, all_results)
-            for ticker in tickers
+            for ticker in tickers or []
         ]
 
         unique_tickers = sorted(set(ticker for _, ticker in ticker_screener))
@@ -549,54 +1648,169 @@ class API_Fetcher:
 
         return unique_tickers, used_screeners, ticker_screener
 
- 
-    async def filter_tickers_by_market_cap_async(self, ticker_screener_pairs: list[tuple[str, str]], min_market_cap=1e9) -> list[str]:
-        if not ticker_screener_pairs:
-            return []
 
-        tickers = list({t for _, t in ticker_screener_pairs})  
+    async def get_ticker_screener_pairs(self, screener_ids: List[str]) -> list[tuple[str, str]]:
+        '''
+        (screener, ticker) pairs for the requested screeners. Membership
+        comes from the ticker_screener data of the current universe
+        snapshot; only screeners missing there are fetched from Yahoo.
+        '''
+        wanted = set(screener_ids)
+        pairs = [(screener, ticker) for screener, ticker in self._ticker_screener if screener in wanted]
 
-        def fetch_market_caps(tickers_batch):
-            try:
-                q = yq.Ticker(tickers_batch)
-                logger.info(f"[YF BATCH] summary keys: {list(q.summary_detail.keys())}")
-                return q.summary_detail
-            except Exception as e:
-                logger.warning(f"[MarketCap] Failed to fetch market caps: {e}")
-                return {}
+        missing = sorted(wanted - {screener for screener, _ in pairs})
+        if missing:
+            logger.info(f"[ScreenerFetcher] Screeners not loaded yet, fetching: {missing}")
+            _, _, fetched = await self.get_tickers_from_screeners_async(missing)
+            pairs.extend(fetched)
+        return pairs
 
-        summary_data = await asyncio.to_thread(fetch_market_caps, tickers)
 
-        filtered = []
-        for ticker in tickers:
-            try:
-                info = summary_data.get(ticker) or {}
-                cap = info.get('marketCap')
-                logger.info(f"[{ticker}] marketCap={cap}")
-                if cap is not None and cap >= min_market_cap:
-                    filtered.append(ticker)
-            except Exception as e:
-                logger.debug(f"[MarketCap] Skipping {ticker}: {e}")
+    async def get_market_caps(self, tickers: list[str]) -> dict[str, float | None]:
+        '''
+        Market caps per ticker. Fresh values come from the market cap
+        cache, the rest is fetched in chunks of market_cap_chunk_size
+        (one multi-symbol summary_detail call each), chunks run
+        concurrently. Tickers Yahoo reports without a market cap are cached
+        as None so they are not asked for again within the TTL; failed
+        chunks and per-symbol error answers are not cached at all.
+        '''
+        market_caps = {}
+        missing = []
+        for ticker in dict.fromkeys(tickers):
+            entry = self.market_cap_cache.get_fresh(ticker)
+            if entry is None:
+                missing.append(ticker)
+            else:
+                market_caps[ticker] = entry.value
+
+        if not missing:
+            return market_caps
+        cached = len(market_caps)
+
+        def _worker(chunk: list[str]) -> dict[str, any]:
+            summary_data = yq.Ticker(chunk).summary_detail or {}
+            if not isinstance(summary_data, dict):
+                raise ValueError(str(summary_data))
+            return summary_data
+
+        async def fetch_chunk(chunk: list[str]) -> dict[str, any]:
+            async with self._semaphore:
+                try:
+                    return await self._run_yahoo(_worker, chunk)
+                except Exception as e:
+                    logger.warning(f"[MarketCap] Chunk of {len(chunk)} tickers failed: {e}")
+                    return None
+
+        size = self.market_cap_chunk_size
+        chunks = [missing[i:i + size] for i in range(0, len(missing), size)]
+        results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+
+        failed = 0
+        for chunk, summary_data in zip(chunks, results):
+            if summary_data is None:
+                failed += len(chunk)
                 continue
+            for ticker in chunk:
+                info = summary_data.get(ticker)
+                # yahooquery answers failed symbols (unknown, rate limited, ...) with an
+                # error string instead of a dict; only a real answer without marketCap is cached
+                if not isinstance(info, dict):
+                    market_caps[ticker] = None
+                    failed += 1
+                    continue
+                cap = info.get('marketCap')
+                self.market_cap_cache.set(ticker, cap)
+                market_caps[ticker] = cap
 
-        return filtered
+        logger.info(
+            f"[MarketCap] {cached} cached, "
+            f"{len(missing)} fetched in {len(chunks)} chunks, {failed} failed"
+        )
+        return market_caps
 
 
-    def fetch_logo(self, ticker_symbol: str, save_path: str = "logo.png"):
-        ticker = yf.Ticker(ticker_symbol)
-        website = ticker.info.get("website")
-        if not website:
-            return None
+    async def filter_tickers_by_market_cap_async(self, ticker_screener_pairs: list[tuple[str, str]], min_market_cap=1e9) -> list[str]:
+        if not ticker_screener_pairs:
+            return []
 
-        domain = urlparse(website).netloc
-        logo_url = f"https://logo.clearbit.com/{domain}"
+        tickers = list(dict.fromkeys(t for _, t in ticker_screener_pairs))
+        market_caps = await self.get_market_caps(tickers)
+
+        return [
+            ticker for ticker in tickers
+            if market_caps.get(ticker) is not None and market_caps[ticker] >= min_market_cap
+        ]
+
+
+    async def _load_company_domain(self, ticker: str, previous: CacheEntry = None):
+        # the website is part of summaryProfile, which the facts cache already holds
+        facts = await self.facts_cache.get_or_load(
+            ticker,
+            lambda previous: self._load_stock_facts(ticker, previous)
+        )
+        website = facts.get("website")
+        if not website and not any(facts.get(key) for key in PROFILE_FACTS):
+            # no summaryProfile in the answer: fail the load instead of caching
+            # "no website" for domain_ttl, the logo's negative TTL applies instead
+            raise ValueError(f"Yahoo returned no profile for {ticker}")
+        domain = urlparse(website).netloc if website else ""
+        return domain, 1, {}
+
+
+    async def get_company_domain(self, ticker: str) -> str | None:
+        domain = await self.domain_cache.get_or_load(
+            ticker,
+            lambda previous: self._load_company_domain(ticker, previous)
+        )
+        return domain or None
 
 
-        response = requests.get(logo_url, timeout=20)
-        if response.status_code == 200:
-            with open(save_path, "wb") as f:
-                f.write(response.content)
-            return save_path
+    async def _download_logo(self, domain: str) -> bytes | None:
+        logo_url = f"https://logo.clearbit.com/{domain}"
+        async with httpx.AsyncClient(timeout=20, follow_redirects=True) as client:
+            response = await client.get(logo_url)
+        if response.status_code == 200 and response.content:
+            return response.content
+        logger.info(f"[Logo] No logo for {domain}: {response.status_code}")
         return None
 
 
+    async def _load_logo(self, ticker: str, previous: CacheEntry = None):
+        key = f"logo:{ticker}"
+        data = await asyncio.to_thread(self.logo_disk_cache.get, key)
+        if data is None:
+            try:
+                domain = await self.get_company_domain(ticker)
+            except Exception as e:
+                # not cached as a domain, the logo miss below lasts logo_negative_ttl
+                logger.warning(f"[Logo] No domain for {ticker}: {e}")
+                domain = None
+            data = await self._download_logo(domain) if domain else None
+            if data:
+                await self._cache_put(self.logo_disk_cache, key, data)
+        data = data or b""
+        return data, max(len(data), 1), {}
+
+
+    async def fetch_logo(self, ticker_symbol: str) -> bytes | None:
+        '''
+        Logo bytes of a company, or None when it has no website or logo.
+        Served from memory, then from the disk cache, and only downloaded
+        from Clearbit when both miss. Misses are cached in memory for
+        logo_negative_ttl, so a ticker without logo is not asked for again
+        on every PDF.
+        '''
+        entry = self.logo_cache.peek(ticker_symbol)
+        if entry is not None and entry.value == b"" and time.monotonic() - entry.stored_at >= self.logo_negative_ttl:
+            self.logo_cache.invalidate(ticker_symbol)
+
+        try:
+            data = await self.logo_cache.get_or_load(
+                ticker_symbol,
+                lambda previous: self._load_logo(ticker_symbol, previous)
+            )
+        except Exception as e:
+            logger.warning(f"[Logo] Fetching logo of {ticker_symbol} failed: {e}")
+            return None
+        return data or None
@@ -1,12 +1,15 @@
 ######### Author: Kevin Garrison ##########
 
-from fastapi.responses import JSONResponse, FileResponse
-from fastapi import FastAPI, Query, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from payload_codec import MSGPACK_ZSTD, StreamPacker, packb
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.encoders import jsonable_encoder
+from contextlib import asynccontextmanager
 from api_data_fetcher import API_Fetcher
+from pydantic import BaseModel
 import logging
-import tempfile
-import os
+import asyncio
+import json
 
 
 logging.basicConfig(
@@ -21,22 +24,52 @@ logger = logging.getLogger(__name__)
 fetcher = API_Fetcher()
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await fetcher.open_sec_client()
+    await fetcher.connect_to_redis()
+    # the company universe is kept fresh in the background, /companies reads its snapshot
+    fetcher.start_universe_refresher()
+    # warm the docling workers without holding back the startup
+    preload_task = asyncio.create_task(fetcher.preload_docling_pool())
+    try:
+        yield
+    finally:
+        preload_task.cancel()
+        await fetcher.stop_universe_refresher()
+        await fetcher.close_sec_client()
+        await fetcher.close_redis()
+        fetcher.shutdown_docling_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/filter-market-cap/")
 async def filter_market_cap(screeners: list[str] = Query(...), min_cap: int = 1_000_000_000):
     logger.info(f"[API FETCHER] screeners: [{screeners}]")
-    all_tickers = await fetcher.get_tickers_from_screeners_async(screeners)
-    logger.info(f"[API FETCHER] filtered tickers [{all_tickers}]")
-    filtered = await fetcher.filter_tickers_by_market_cap_async(all_tickers[2], min_market_cap=min_cap)
+    ticker_screener = await fetcher.get_ticker_screener_pairs(screeners)
+    logger.info(f"[API FETCHER] {len(ticker_screener)} ticker/screener pairs")
+    filtered = await fetcher.filter_tickers_by_market_cap_async(ticker_screener, min_market_cap=min_cap)
 
     return JSONResponse(content=filtered)
 
 
 @app.get("/companies")
-async def all_available_companies():
+async def all_available_companies(request: Request):
     companies, screeners, ticker_screener = await fetcher.get_available_company_data()
+    freshness = fetcher.universe_status()
+    if not freshness["ready"]:
+        # cold start without snapshot and no successful refresh yet
+        return JSONResponse(
+            content={"detail": "Company universe is not built yet", "freshness": freshness},
+            status_code=503,
+            headers={"Retry-After": str(int(fetcher.universe_refresh_tick))}
+        )
+    etag = f'"{freshness["version"]}"'
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
 
     if companies.empty:
         return JSONResponse(content={"tickers": {}, "screeners": []}, status_code=204)
@@ -47,19 +80,60 @@ async def all_available_companies():
     content = jsonable_encoder({
         "companies": companies,
         "screeners": screeners,
-        "ticker_screener": ticker_screener
+        "ticker_screener": ticker_screener,
+        "freshness": freshness
     })
 
-    return JSONResponse(content=content, status_code=200)
+    return JSONResponse(content=content, status_code=200, headers={"ETag": etag})
+
+
+@app.get("/companies/freshness")
+async def companies_freshness():
+    return JSONResponse(content=fetcher.universe_status(), status_code=200)
+
+
+class StockHistoryBatch(BaseModel):
+    tickers: list[str]
+    period: str = "10y"
+    interval: str = "1mo"
+    start: str | None = None
+
+
+@app.get("/stock-history")
+async def stock_history_batch(tickers: list[str] = Query(...), period: str = "10y", interval: str = "1mo",
+                              start: str = None):
+    # accepts ?tickers=AAPL&tickers=MSFT as well as ?tickers=AAPL,MSFT
+    symbols = [t for entry in tickers for t in entry.split(",")]
+    data = await fetcher.fetch_stock_history_batch_yq(symbols, period=period, interval=interval, start=start)
+    return JSONResponse(content=data, status_code=200)
+
+
+@app.post("/stock-history")
+async def stock_history_batch_post(body: StockHistoryBatch):
+    # for universe-sized ticker lists that do not fit into a query string
+    data = await fetcher.fetch_stock_history_batch_yq(
+        body.tickers, period=body.period, interval=body.interval, start=body.start
+    )
+    return JSONResponse(content=data, status_code=200)
 
 
 @app.get("/stock-history/{ticker}")
-async def stock_history(ticker: str):
-    data = await fetcher.fetch_selected_stock_history_yq(selected_ticker=ticker)
+async def stock_history(ticker: str, start: str = None):
+    # ?start=YYYY-MM-DD only returns the range since start (incremental sync)
+    data = await fetcher.fetch_selected_stock_history_yq(selected_ticker=ticker, start=start)
     encoded = jsonable_encoder(data['price_history'])
     return JSONResponse(content=encoded, status_code=200)
 
 
+@app.get("/yfinance-company-facts")
+async def company_facts_yf_batch(tickers: list[str] = Query(...)):
+    # accepts ?tickers=AAPL&tickers=MSFT as well as ?tickers=AAPL,MSFT
+    symbols = [t for entry in tickers for t in entry.split(",")]
+    data = await fetcher.fetch_stock_facts_batch_yq(symbols)
+    encoded = jsonable_encoder(data)
+    return JSONResponse(content=encoded, status_code=200)
+
+
 @app.get("/yfinance-company-facts/{ticker}")
 async def company_facts_yf(ticker: str):
     data = await fetcher.fetch_selected_stock_facts_yq(selected_ticker=ticker)
@@ -68,8 +142,35 @@ async def company_facts_yf(ticker: str):
 
 
 @app.get("/company-context/{ticker}")
-async def company_context_selected_ticker(ticker: str):
-    context = await fetcher.preprocess_and_pull_context_sec_yf(ticker=ticker)
+async def company_context_selected_ticker(ticker: str, request: Request, stream: bool = False,
+                                         sections: list[str] = Query(None)):
+    # ?sections=risk_factors&sections=mda (or 1A, 7, ...) limits 10-K/10-Q/20-F
+    # conversion to those items, ?sections=all converts whole filings
+    sections = [s for entry in sections for s in entry.split(",")] if sections else None
+    accept = request.headers.get("accept", "")
+    # internal callers can ask for msgpack+zstd instead of JSON, filing bytes then stay binary
+    binary = MSGPACK_ZSTD in accept
+
+    # streaming on ?stream=true or Accept: application/x-ndjson
+    if stream or "application/x-ndjson" in accept:
+        if binary:
+            async def packed_records():
+                packer = StreamPacker()
+                async for record in fetcher.stream_company_context(ticker, sections):
+                    yield packer.pack(record)
+                yield packer.close()
+
+            return StreamingResponse(packed_records(), media_type=MSGPACK_ZSTD)
+
+        async def ndjson_records():
+            async for record in fetcher.stream_company_context(ticker, sections):
+                yield json.dumps(jsonable_encoder(record)) + "\n"
+
+        return StreamingResponse(ndjson_records(), media_type="application/x-ndjson")
+
+    context = await fetcher.get_company_context(ticker=ticker, sections=sections)
+    if binary:
+        return Response(content=await asyncio.to_thread(packb, context), media_type=MSGPACK_ZSTD)
     encoded = jsonable_encoder(context)
     return JSONResponse(content=encoded, status_code=200)
 
@@ -81,20 +182,46 @@ async def company_news_selected_ticker(ticker: str):
     return JSONResponse(content=encoded, status_code=200)
 
 
+@app.get("/metrics")
+async def metrics():
+    content = {
+        "filing_cache": fetcher.filing_cache.stats(),
+        "markdown_cache": fetcher.markdown_cache.stats(),
+        "submissions_cache": fetcher.submissions_cache.stats(),
+        "facts_cache": fetcher.facts_cache.stats(),
+        "news_cache": fetcher.news_cache.stats(),
+        "market_cap_cache": fetcher.market_cap_cache.stats(),
+        "logo_cache": fetcher.logo_cache.stats(),
+        "logo_disk_cache": fetcher.logo_disk_cache.stats(),
+        "domain_cache": fetcher.domain_cache.stats(),
+        "universe": fetcher.universe_status(),
+        "docling": fetcher.docling_stats,
+    }
+    return JSONResponse(content=content, status_code=200)
+
+
+@app.get("/metrics/cache-keys")
+async def metrics_cache_keys():
+    content = {
+        "facts_cache": fetcher.facts_cache.key_stats(),
+        "news_cache": fetcher.news_cache.key_stats(),
+        "context_cache": fetcher.context_cache.key_stats(),
+    }
+    return JSONResponse(content=content, status_code=200)
+
+
 @app.get("/get-logo/{ticker}")
-def get_logo(ticker: str):
-    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-    logo_path = fetcher.fetch_logo(ticker, tmp_file.name)
+async def get_logo(ticker: str):
+    logo = await fetcher.fetch_logo(ticker)
 
-    if not logo_path or not os.path.exists(logo_path):
+    if not logo:
         raise HTTPException(status_code=404, detail="Logo not found or company website missing")
 
-    return FileResponse(
-        path=logo_path,
+    return Response(
+        content=logo,
         media_type="image/png",
-        filename=f"{ticker}_logo.png",
-        background=lambda: os.remove(logo_path)
+        headers={
+            "Content-Disposition": f"inline; filename={ticker}_logo.png",
+            "Cache-Control": "public, max-age=86400",
+        }
     )
-
-
-
@@ -0,0 +1,136 @@
+######### Author: Kevin Garrison ##########
+
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import argparse
+import resource
+import glob
+import time
+import sys
+import os
+
+
+########################################################
+# Compares the conversion engines of doc_converter on
+# EDGAR HTML: throughput, peak memory and output size.
+# Every engine runs in a fresh spawned process (like the
+# docling pool), so peak RSS is not shared between them.
+#
+#   python benchmarks/bench_conversion_engines.py
+#   python benchmarks/bench_conversion_engines.py --scale 200 path/to/aapl-20240928.htm
+#   python benchmarks/bench_conversion_engines.py --form 10-K --sections risk_factors mda
+#
+# Without paths the bundled samples/*.htm are used; they
+# are small synthetic filings, --scale repeats their body
+# to reach the size of a real 10-K. Real filings from
+# EDGAR can be passed as paths.
+########################################################
+
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+
+def scale_document(raw_content: bytes, scale: int) -> bytes:
+    if scale <= 1:
+        return raw_content
+    start = raw_content.find(b"<body")
+    start = raw_content.find(b">", start) + 1
+    end = raw_content.rfind(b"</body>")
+    if start <= 0 or end < start:
+        return raw_content * scale
+    return raw_content[:start] + raw_content[start:end] * scale + raw_content[end:]
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_engine(engine: str, paths: list[str], scale: int, repeat: int,
+               form: str = None, sections: list[str] = None) -> dict:
+    from doc_converter import init_worker, convert_html_to_markdown
+
+    rss_start = max_rss_mb()
+    started = time.perf_counter()
+    init_worker(None, engine)
+    setup_seconds = time.perf_counter() - started
+
+    documents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            raw_content = scale_document(f.read(), scale)
+
+        timings = []
+        markdown = ""
+        for _ in range(repeat):
+            started = time.perf_counter()
+            markdown = convert_html_to_markdown(os.path.basename(path), raw_content, engine, form, sections)
+            timings.append(time.perf_counter() - started)
+
+        documents.append({
+            "name": os.path.basename(path),
+            "bytes_in": len(raw_content),
+            "chars_out": len(markdown or ""),
+            "best_seconds": min(timings),
+        })
+
+    return {
+        "engine": engine,
+        "setup_seconds": setup_seconds,
+        "rss_start_mb": rss_start,
+        "rss_peak_mb": max_rss_mb(),
+        "documents": documents,
+    }
+
+
+def print_report(results: list[dict]):
+    print(f"{'engine':<8} {'document':<28} {'in KB':>9} {'out KB':>9} {'out/in':>7} {'best ms':>10} {'MB/s':>8}")
+    for result in results:
+        for doc in result["documents"]:
+            seconds = max(doc["best_seconds"], 1e-9)
+            print(
+                f"{result['engine']:<8} {doc['name'][:28]:<28} "
+                f"{doc['bytes_in'] / 1024:>9.1f} {doc['chars_out'] / 1024:>9.1f} "
+                f"{doc['chars_out'] / max(doc['bytes_in'], 1):>7.3f} "
+                f"{seconds * 1000:>10.1f} {doc['bytes_in'] / 1024 ** 2 / seconds:>8.2f}"
+            )
+    print()
+    print(f"{'engine':<8} {'setup s':>9} {'RSS start MB':>13} {'RSS peak MB':>12} {'total MB/s':>11}")
+    for result in results:
+        total_bytes = sum(doc["bytes_in"] for doc in result["documents"])
+        total_seconds = max(sum(doc["best_seconds"] for doc in result["documents"]), 1e-9)
+        print(
+            f"{result['engine']:<8} {result['setup_seconds']:>9.2f} {result['rss_start_mb']:>13.1f} "
+            f"{result['rss_peak_mb']:>12.1f} {total_bytes / 1024 ** 2 / total_seconds:>11.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the filing conversion engines")
+    parser.add_argument("paths", nargs="*", help="HTML filings, default: samples/*.htm")
+    parser.add_argument("--engines", nargs="+", default=["lxml", "docling"])
+    parser.add_argument("--scale", type=int, default=1, help="repeat the document body n times")
+    parser.add_argument("--repeat", type=int, default=3, help="conversions per document, best one counts")
+    parser.add_argument("--form", default=None, help="form of the documents, needed for --sections")
+    parser.add_argument("--sections", nargs="+", default=None, help="only convert these items, e.g. risk_factors mda")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(SERVICE_DIR, "samples", "*.htm")))
+    if not paths:
+        parser.error("no HTML documents found")
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for engine in args.engines:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(
+                run_engine, engine, paths, args.scale, args.repeat, args.form, args.sections
+            ).result())
+
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
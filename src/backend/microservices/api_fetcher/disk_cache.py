@@ -0,0 +1,172 @@
+######### Author: Kevin Garrison ##########
+
+
+from dataclasses import dataclass, field
+import tempfile
+import hashlib
+import logging
+import fcntl
+import os
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DiskCache:
+    """
+    Content-addressed, size-capped on-disk cache.
+
+    Blobs are stored under the sha256 of their content, keys only hold a
+    small reference file pointing to the blob. Writes go through a temp
+    file + os.replace, and eviction runs under an exclusive file lock, so
+    several uvicorn workers can share one directory. LRU order is kept in
+    the blob mtimes, which are touched on every hit.
+    """
+    directory: str
+    max_bytes: int = 2 * 1024 ** 3
+    hits: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+    evictions: int = field(init=False, default=0)
+    _approx_bytes: int = field(init=False, default=0)
+
+
+    def __post_init__(self):
+        os.makedirs(os.path.join(self.directory, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, "refs"), exist_ok=True)
+        self._approx_bytes = sum(size for _, size, _ in self._scan_blobs())
+
+
+    def _ref_path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "refs", digest[:2], digest)
+
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+
+    def _atomic_write(self, path: str, data: bytes):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # unique temp name per write: threads of one process write concurrently
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+    def _scan_blobs(self):
+        blobs_dir = os.path.join(self.directory, "blobs")
+        for root, _, files in os.walk(blobs_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+
+    def get(self, key: str) -> bytes | None:
+        ref_path = self._ref_path(key)
+        try:
+            with open(ref_path, "r") as f:
+                digest = f.read().strip()
+            blob_path = self._blob_path(digest)
+            with open(blob_path, "rb") as f:
+                data = f.read()
+            os.utime(blob_path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+
+    def put(self, key: str, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            self._atomic_write(blob_path, data)
+            self._approx_bytes += len(data)
+        else:
+            os.utime(blob_path)
+        self._atomic_write(self._ref_path(key), digest.encode("utf-8"))
+
+        if self._approx_bytes > self.max_bytes:
+            self.evict()
+        return digest
+
+
+    def evict(self, target_ratio: float = 0.9):
+        """
+        Drops least recently used blobs until the cache is below
+        target_ratio * max_bytes, then the references that pointed to
+        them. A reference written concurrently to an evicted blob simply
+        resolves to a miss until the next eviction removes it.
+        """
+        lock_path = os.path.join(self.directory, ".evict.lock")
+        with open(lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                blobs = sorted(self._scan_blobs(), key=lambda blob: blob[2])
+                total = sum(size for _, size, _ in blobs)
+                target = self.max_bytes * target_ratio
+                for path, size, _ in blobs:
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                        total -= size
+                        self.evictions += 1
+                    except FileNotFoundError:
+                        continue
+                self._approx_bytes = total
+                dangling = self._remove_dangling_refs()
+                logger.info(f"[DiskCache] Evicted down to {total} bytes in {self.directory}, dropped {dangling} refs")
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+    def _remove_dangling_refs(self) -> int:
+        removed = 0
+        refs_dir = os.path.join(self.directory, "refs")
+        for root, _, files in os.walk(refs_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    with open(path, "r") as f:
+                        digest = f.read().strip()
+                    if digest and os.path.exists(self._blob_path(digest)):
+                        continue
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "directory": self.directory,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "approx_bytes": self._approx_bytes,
+            "max_bytes": self.max_bytes,
+        }
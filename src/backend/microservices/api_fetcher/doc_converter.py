@@ -0,0 +1,145 @@
+######### Author: Kevin Garrison ##########
+
+
+from html_extractor import html_to_markdown, EXTRACTOR_VERSION
+from filing_sections import extract_sections
+from contextlib import contextmanager
+from io import BytesIO
+import importlib.metadata
+import threading
+import hashlib
+import signal
+import json
+import time
+import os
+
+
+########################################################
+# Functions in this module run inside the docling
+# process pool of API_Fetcher. They must stay importable
+# at module level (spawned workers re-import this file)
+# and should not pull in the rest of the api-fetcher.
+########################################################
+
+
+WARMUP_SAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples", "warmup_filing.htm")
+
+
+# Bump CONVERTER_VERSION whenever the conversion code changes its output,
+# conversion_options() holds every setting that shapes the markdown. Both
+# end up in conversion_fingerprint(), which keys the markdown cache.
+# ENGINES: "docling" (layout aware, slow) or "lxml" (streaming
+# html_extractor, fast, text and tables only).
+CONVERTER_VERSION = "2"
+ENGINES = ("docling", "lxml")
+DEFAULT_ENGINE = "docling"
+
+
+_converter = None
+_init_seconds: float = None
+
+
+class ConversionTimeout(TimeoutError):
+    pass
+
+
+def conversion_options(engine: str = DEFAULT_ENGINE) -> dict:
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown conversion engine '{engine}', expected one of {ENGINES}")
+    return {"engine": engine, "export": "markdown"}
+
+
+def init_worker(warmup_path: str = None, engine: str = DEFAULT_ENGINE):
+    '''
+    Process pool initializer: builds the converter of this worker once,
+    loads the HTML pipeline and optionally converts a small sample filing
+    so the first real request does not pay the model/pipeline setup.
+    The lxml engine has nothing to preload.
+    '''
+    global _init_seconds
+    start = time.perf_counter()
+    if engine == "docling":
+        from docling.datamodel.base_models import InputFormat
+        converter = get_converter()
+        converter.initialize_pipeline(InputFormat.HTML)
+    if warmup_path and os.path.exists(warmup_path):
+        try:
+            with open(warmup_path, "rb") as f:
+                convert_html_to_markdown("warmup", f.read(), engine)
+        except Exception as e:
+            # an initializer that raises breaks the whole pool
+            print(f"[docling] Warm-up conversion failed in worker {os.getpid()}: {e}")
+    _init_seconds = time.perf_counter() - start
+
+
+def get_converter():
+    # docling (and torch behind it) is only imported by workers that use it
+    from docling.document_converter import DocumentConverter
+    global _converter
+    if _converter is None:
+        _converter = DocumentConverter()
+    return _converter
+
+
+def conversion_fingerprint(engine: str = DEFAULT_ENGINE) -> str:
+    if engine == "docling":
+        engine_version = importlib.metadata.version("docling")
+    else:
+        engine_version = f"{importlib.metadata.version('lxml')}+{EXTRACTOR_VERSION}"
+    options = json.dumps(conversion_options(engine), sort_keys=True)
+    raw = f"{engine_version}|{CONVERTER_VERSION}|{options}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def worker_stats() -> dict:
+    return {"pid": os.getpid(), "init_seconds": _init_seconds}
+
+
+@contextmanager
+def _deadline(seconds: float = None):
+    '''
+    Raises ConversionTimeout in the worker once seconds have passed, so a
+    slow document gives its worker back instead of holding it. Pool
+    workers run their tasks in the main thread, where SIGALRM is delivered.
+    '''
+    if not seconds or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def _expire(signum, frame):
+        raise ConversionTimeout(f"conversion exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, _expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def convert_html_to_markdown(name: str, raw_content: bytes, engine: str = DEFAULT_ENGINE,
+                             form: str = None, sections: list[str] = None, timeout: float = None) -> str:
+    '''
+    With form and sections only those items of a 10-K/10-Q/20-F are
+    converted; when none of them can be located the whole document is.
+    With timeout the conversion raises ConversionTimeout after that many
+    seconds.
+    '''
+    with _deadline(timeout):
+        return _convert(name, raw_content, engine, form, sections)
+
+
+def _convert(name: str, raw_content: bytes, engine: str, form: str, sections: list[str]) -> str:
+    if form and sections:
+        section_content, _ = extract_sections(raw_content, form, sections)
+        if section_content is not None:
+            raw_content = section_content
+
+    if engine == "lxml":
+        return html_to_markdown(raw_content)
+
+    from docling.datamodel.base_models import DocumentStream
+    html_stream = DocumentStream(name=name, stream=BytesIO(raw_content))
+    result = get_converter().convert(html_stream)
+    return result.document.export_to_markdown()
@@ -0,0 +1,106 @@
+######### Author: Kevin Garrison ##########
+
+
+from dataclasses import dataclass, field
+import pandas as pd
+import numpy as np
+
+
+INDEX_COLUMNS = ["form", "accessionNumber", "reportDate", "filingDate", "primaryDocument"]
+
+
+@dataclass
+class FilingIndex:
+    """
+    Columnar index over the filings of one CIK.
+
+    The columns of filings['recent'] (and optionally the older pages listed
+    in filings['files']) are kept as NumPy arrays, newest filing first. A
+    single pass groups the row positions by form, so "latest n filings of
+    form X" is a dict lookup plus a slice.
+    """
+    columns: dict = field(default_factory=lambda: {c: np.array([], dtype=object) for c in INDEX_COLUMNS})
+    loaded_pages: set = field(default_factory=set)
+    _positions_by_form: dict = field(init=False, default_factory=dict)
+
+
+    def __post_init__(self):
+        self._build_groups()
+
+
+    @classmethod
+    def from_submissions(cls, filings: dict) -> "FilingIndex":
+        recent = (filings or {}).get("recent", {})
+        return cls(columns=cls._columns_from_block(recent))
+
+
+    @staticmethod
+    def _columns_from_block(block: dict) -> dict:
+        length = len(block.get("form", []))
+        columns = {}
+        for column in INDEX_COLUMNS:
+            values = block.get(column) or [""] * length
+            columns[column] = np.asarray(values, dtype=object)
+        return columns
+
+
+    def _build_groups(self):
+        forms = self.columns["form"]
+        if len(forms) == 0:
+            self._positions_by_form = {}
+            return
+        # stable sort keeps the newest-first order inside every form group
+        order = np.argsort(forms, kind="stable")
+        sorted_forms = forms[order]
+        boundaries = np.flatnonzero(sorted_forms[1:] != sorted_forms[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(forms)]))
+        self._positions_by_form = {
+            str(sorted_forms[start]): order[start:end]
+            for start, end in zip(starts, ends)
+        }
+
+
+    def extend(self, page_name: str, page: dict):
+        """
+        Appends an older page from filings['files'] (the pages are already
+        ordered newest to oldest, so appending keeps the overall order).
+        """
+        if page_name in self.loaded_pages:
+            return
+        page_columns = self._columns_from_block(page)
+        self.columns = {
+            column: np.concatenate((self.columns[column], page_columns[column]))
+            for column in INDEX_COLUMNS
+        }
+        self.loaded_pages.add(page_name)
+        self._build_groups()
+
+
+    def __len__(self) -> int:
+        return len(self.columns["form"])
+
+
+    def forms(self) -> list[str]:
+        return list(self._positions_by_form)
+
+
+    def latest(self, form: str, n: int = 1) -> np.ndarray:
+        positions = self._positions_by_form.get(form)
+        if positions is None:
+            return np.array([], dtype=np.intp)
+        return positions[:n]
+
+
+    def latest_by_forms(self, forms: list[str]) -> dict:
+        mapping = {}
+        for form in forms:
+            positions = self.latest(form, 1)
+            if len(positions):
+                mapping[form] = int(positions[0])
+        return mapping
+
+
+    def rows(self, positions) -> pd.DataFrame:
+        positions = np.asarray(positions, dtype=np.intp)
+        return pd.DataFrame({column: self.columns[column][positions] for column in INDEX_COLUMNS})
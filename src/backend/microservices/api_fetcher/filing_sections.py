@@ -0,0 +1,239 @@
+######### Author: Kevin Garrison ##########
+
+
+from dataclasses import dataclass
+import re
+
+
+########################################################
+# Locates the item sections of 10-K, 10-Q and 20-F
+# documents in the raw HTML, so only the requested items
+# have to be converted and embedded. Tags and entities
+# are masked with spaces of the same length, offsets in
+# the masked copy are therefore offsets in the raw bytes.
+# A candidate that stays inside one table (a table of
+# contents row) or carries hardly any text is no section.
+# Runs inside the docling process pool, keep it free of
+# api-fetcher imports.
+########################################################
+
+
+# section name -> (part, item); part is None where the item number is unique
+SECTIONS = {
+    "10-K": {
+        "business": (None, "1"),
+        "risk_factors": (None, "1A"),
+        "cybersecurity": (None, "1C"),
+        "legal_proceedings": (None, "3"),
+        "mda": (None, "7"),
+        "market_risk": (None, "7A"),
+        "financial_statements": (None, "8"),
+        "controls": (None, "9A"),
+    },
+    "10-Q": {
+        "financial_statements": ("I", "1"),
+        "mda": ("I", "2"),
+        "market_risk": ("I", "3"),
+        "controls": ("I", "4"),
+        "legal_proceedings": ("II", "1"),
+        "risk_factors": ("II", "1A"),
+    },
+    "20-F": {
+        # 20-F risk factors are 3.D inside Item 3 "Key Information"
+        "risk_factors": (None, "3"),
+        "business": (None, "4"),
+        "mda": (None, "5"),
+        "financial_statements": (None, "18"),
+    },
+}
+
+
+MASK = re.compile(rb"<[^>]*>|&[#a-zA-Z0-9]{1,10};|\xc2\xa0|\xa0")
+ITEM_HEADING = re.compile(rb"item\s*(\d{1,2}[a-d]?)(?![0-9a-z])", re.IGNORECASE)
+PART_HEADING = re.compile(rb"part\s+(iv|iii|ii|i)(?![a-z])", re.IGNORECASE)
+TAG_NAME = re.compile(rb"<\s*/?\s*([a-zA-Z0-9:]+)")
+TABLE_TAG = re.compile(rb"<\s*(/?)\s*table(?![a-zA-Z0-9:])", re.IGNORECASE)
+WHITESPACE = re.compile(rb"\s+")
+CHARSET = re.compile(rb"""(?:charset|encoding)\s*=\s*["']?([a-zA-Z0-9_\-]+)""", re.IGNORECASE)
+ITEM_NAME = re.compile(r"^(?:item[\s_\-]*)?(\d{1,2}[a-d]?)$", re.IGNORECASE)
+
+BLOCK_TAGS = {
+    b"p", b"div", b"td", b"th", b"tr", b"table", b"br", b"hr", b"li", b"body",
+    b"center", b"section", b"h1", b"h2", b"h3", b"h4", b"h5", b"h6",
+}
+HEADING_LOOKBACK = 4096
+# visible characters a section needs beyond its heading line, a table of
+# contents entry ("Item 1A. Risk Factors 5") has a few dozen
+MIN_SECTION_CHARS = 100
+
+
+@dataclass
+class Heading:
+    kind: str
+    label: str
+    part: str
+    start: int
+
+
+def section_form(form: str) -> str | None:
+    '''
+    Maps a filing form (10-K, 10-K/A, 10-KT, ...) onto its SECTIONS
+    catalogue, None for forms without item structure (8-K, 4, ...).
+    '''
+    base = (form or "").upper().split("/")[0].strip()
+    for catalogue_form in SECTIONS:
+        if base.startswith(catalogue_form):
+            return catalogue_form
+    return None
+
+
+def resolve_section(form: str, name: str) -> tuple[str, str] | None:
+    '''
+    (part, item) of a section given by name ("risk_factors") or by
+    item ("1A", "item_7").
+    '''
+    catalogue = SECTIONS.get(section_form(form), {})
+    key = name.strip().lower()
+    if key in catalogue:
+        return catalogue[key]
+    item = ITEM_NAME.match(key)
+    return (None, item.group(1).upper()) if item else None
+
+
+def _block_start(raw: bytes, masked: bytes, pos: int) -> int | None:
+    '''
+    Offset of the block tag a heading starts in, or None when the match
+    is preceded by text (a reference like "see Item 1A" in prose).
+    Inline tags (b, span, font, a, ix:*) are skipped on the way back.
+    '''
+    stop = max(0, pos - HEADING_LOOKBACK)
+    i = pos - 1
+    while i >= stop:
+        if raw[i] == 0x3E:
+            tag_start = raw.rfind(b"<", stop, i)
+            if tag_start < 0:
+                return None
+            name = TAG_NAME.match(raw, tag_start)
+            if name and name.group(1).lower() in BLOCK_TAGS:
+                return tag_start
+            i = tag_start - 1
+            continue
+        if not masked[i:i + 1].isspace():
+            return None
+        i -= 1
+    return 0 if pos == 0 else None
+
+
+def mask(raw_content: bytes) -> bytes:
+    return MASK.sub(lambda match: b" " * len(match.group()), raw_content)
+
+
+def find_headings(raw_content: bytes, masked: bytes = None) -> list[Heading]:
+    if masked is None:
+        masked = mask(raw_content)
+    matches = sorted(
+        [(m.start(), "part", m.group(1).upper().decode()) for m in PART_HEADING.finditer(masked)]
+        + [(m.start(), "item", m.group(1).upper().decode()) for m in ITEM_HEADING.finditer(masked)]
+    )
+
+    headings = []
+    part = None
+    for pos, kind, label in matches:
+        start = _block_start(raw_content, masked, pos)
+        if start is None:
+            continue
+        if kind == "part":
+            part = label
+        headings.append(Heading(kind=kind, label=label, part=part, start=start))
+    return headings
+
+
+def table_ranges(raw_content: bytes) -> list[tuple[int, int]]:
+    '''
+    (start, end) offsets of the outermost tables, an unclosed table runs
+    to the end of the document.
+    '''
+    ranges = []
+    depth = 0
+    start = 0
+    for match in TABLE_TAG.finditer(raw_content):
+        if not match.group(1):
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                ranges.append((start, match.end()))
+    if depth:
+        ranges.append((start, len(raw_content)))
+    return ranges
+
+
+def _plausible_span(masked: bytes, tables: list[tuple[int, int]], start: int, end: int) -> bool:
+    if any(table_start <= start and end <= table_end for table_start, table_end in tables):
+        return False
+    text = WHITESPACE.sub(b" ", masked[start:end]).strip()
+    return len(text) >= MIN_SECTION_CHARS
+
+
+def _best_span(headings: list[Heading], masked: bytes, tables: list[tuple[int, int]],
+               part: str | None, item: str) -> tuple[int, int] | None:
+    '''
+    The table of contents repeats every heading, so each candidate runs
+    up to the next heading and the longest plausible candidate wins.
+    None when only table of contents entries (or empty items) matched.
+    '''
+    spans = []
+    for i, heading in enumerate(headings):
+        if heading.kind != "item" or heading.label != item:
+            continue
+        end = next((h.start for h in headings[i + 1:] if h.start > heading.start), len(masked))
+        if _plausible_span(masked, tables, heading.start, end):
+            spans.append((heading.part, heading.start, end))
+
+    if part is not None and any(p == part for p, _, _ in spans):
+        spans = [span for span in spans if span[0] == part]
+    if not spans:
+        return None
+    _, start, end = max(spans, key=lambda span: span[2] - span[1])
+    return start, end
+
+
+def extract_sections(raw_content: bytes, form: str, sections: list[str]) -> tuple[bytes | None, list[str]]:
+    '''
+    Cuts the requested sections out of a filing and wraps them into a
+    small HTML document (keeping the original charset). Returns
+    (html, found section names), or (None, []) when the form has no item
+    structure or none of the sections was found outside the table of
+    contents; callers then fall back to the whole document.
+    '''
+    if not raw_content or section_form(form) is None:
+        return None, []
+
+    masked = mask(raw_content)
+    headings = find_headings(raw_content, masked)
+    tables = table_ranges(raw_content)
+    spans = {}
+    for name in sections:
+        key = resolve_section(form, name)
+        span = _best_span(headings, masked, tables, *key) if key else None
+        if span:
+            spans.setdefault(span, []).append(name)
+    if not spans:
+        return None, []
+
+    # overlapping sections (e.g. 7 and 7A of a filing without 7A heading) are merged
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start < merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+
+    charset = CHARSET.search(raw_content[:4096])
+    charset = charset.group(1) if charset else b"utf-8"
+    body = b"\n".join(raw_content[start:end] for start, end in merged)
+    document = b'<html><head><meta charset="' + charset + b'"></head><body>' + body + b"</body></html>"
+    found = [name for names in spans.values() for name in names]
+    return document, found
@@ -0,0 +1,214 @@
+######### Author: Kevin Garrison ##########
+
+
+from lxml import etree
+import re
+
+
+########################################################
+# Streaming HTML -> markdown extraction for EDGAR filings
+# (the "lxml" conversion engine). The document is fed to
+# libxml2 in chunks and only parser target callbacks are
+# handled, no element tree (lxml or BeautifulSoup) is
+# ever built, so memory stays flat on very large 10-Ks.
+# Runs inside the docling process pool like docling.
+########################################################
+
+
+# Bump whenever the extraction changes its output, it is part of the
+# conversion fingerprint that keys the markdown cache.
+EXTRACTOR_VERSION = "1"
+FEED_CHUNK_BYTES = 1024 ** 2
+
+
+# ix:header holds the hidden inline XBRL facts, contexts and units
+SKIPPED_TAGS = {"head", "title", "script", "style", "noscript", "template", "ix:header"}
+BLOCK_TAGS = {
+    "p", "div", "br", "hr", "section", "article", "center", "blockquote",
+    "pre", "ul", "ol", "li", "dl", "dt", "dd", "body",
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+CELL_TAGS = {"td", "th"}
+
+# EDGAR tables put currency signs, brackets and percent signs in cells of
+# their own; they are glued back onto the number next to them
+OPENING_AFFIXES = {"$", "(", "$(", "€", "£"}
+CLOSING_AFFIXES = {")", "%", ")%", "%)"}
+
+HIDDEN_STYLE = re.compile(r"display\s*:\s*none", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+
+
+def _collapse(text: str) -> str:
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def _compact_row(cells: list[str]) -> tuple[list[str], bool]:
+    '''
+    Drops the empty spacer cells of a row and merges affix cells.
+    Also reports whether the row started with an empty cell (column
+    headers usually do), so it can be right-aligned against the others.
+    '''
+    leading_blank = bool(cells) and not cells[0]
+    compact = []
+    for cell in cells:
+        if not cell:
+            continue
+        if compact and (cell in CLOSING_AFFIXES or compact[-1] in OPENING_AFFIXES):
+            compact[-1] = f"{compact[-1]}{cell}"
+        else:
+            compact.append(cell)
+    return compact, leading_blank
+
+
+class _MarkdownTarget:
+    '''
+    lxml parser target collecting markdown blocks. Hidden content
+    (skipped tags and anything styled display:none) is tracked with a
+    depth counter; only the outermost table builds rows, text of nested
+    tables lands in the enclosing cell.
+    '''
+
+    def __init__(self):
+        self.blocks = []
+        self._text = []
+        self._stack = []
+        self._hidden_depth = 0
+        self._table_depth = 0
+        self._rows = []
+        self._row = None
+        self._cell = None
+        self._heading = None
+
+
+    def start(self, tag, attrib):
+        tag = tag.lower()
+        hidden = tag in SKIPPED_TAGS or bool(HIDDEN_STYLE.search(attrib.get("style", "")))
+        self._stack.append(hidden)
+        if hidden:
+            self._hidden_depth += 1
+            return
+        if self._hidden_depth:
+            return
+
+        if tag == "table":
+            self._table_depth += 1
+            if self._table_depth == 1:
+                self._flush()
+                self._rows = []
+            return
+        if self._table_depth:
+            if self._table_depth == 1 and tag == "tr":
+                self._row = []
+            elif self._table_depth == 1 and tag in CELL_TAGS:
+                self._cell = []
+            elif self._cell is not None and (tag in BLOCK_TAGS or tag in CELL_TAGS):
+                self._cell.append(" ")
+            return
+
+        if tag in BLOCK_TAGS or tag in HEADING_TAGS:
+            self._flush()
+        if tag in HEADING_TAGS:
+            self._heading = int(tag[1])
+        elif tag == "li":
+            self._text.append("- ")
+
+
+    def end(self, tag):
+        tag = tag.lower()
+        hidden = self._stack.pop() if self._stack else False
+        if hidden:
+            self._hidden_depth -= 1
+            return
+        if self._hidden_depth:
+            return
+
+        if tag == "table":
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self._end_table()
+            return
+        if self._table_depth:
+            if self._table_depth == 1 and tag in CELL_TAGS and self._cell is not None:
+                if self._row is None:
+                    self._row = []
+                self._row.append(_collapse("".join(self._cell)))
+                self._cell = None
+            elif self._table_depth == 1 and tag == "tr" and self._row is not None:
+                self._rows.append(self._row)
+                self._row = None
+            return
+
+        if tag in BLOCK_TAGS or tag in HEADING_TAGS:
+            self._flush()
+
+
+    def data(self, data):
+        if self._hidden_depth:
+            return
+        if self._cell is not None:
+            self._cell.append(data)
+        elif not self._table_depth:
+            self._text.append(data)
+
+
+    def comment(self, text):
+        pass
+
+
+    def close(self) -> str:
+        if self._table_depth:
+            self._end_table()
+        self._flush()
+        return "\n\n".join(self.blocks)
+
+
+    def _flush(self):
+        text = _collapse("".join(self._text))
+        self._text = []
+        if text and text != "-":
+            if self._heading:
+                text = f"{'#' * self._heading} {text}"
+            self.blocks.append(text)
+        self._heading = None
+
+
+    def _end_table(self):
+        if self._row:
+            self._rows.append(self._row)
+        rows = [_compact_row(row) for row in self._rows]
+        rows = [(cells, leading_blank) for cells, leading_blank in rows if cells]
+        self._rows, self._row, self._cell, self._table_depth = [], None, None, 0
+        if not rows:
+            return
+
+        width = max(len(cells) for cells, _ in rows)
+        if width == 1:
+            # layout tables (one text cell per row) are plain paragraphs
+            self.blocks.extend(cells[0] for cells, _ in rows)
+            return
+
+        lines = []
+        for i, (cells, leading_blank) in enumerate(rows):
+            padding = [""] * (width - len(cells))
+            cells = padding + cells if leading_blank else cells + padding
+            lines.append("| " + " | ".join(cell.replace("|", "\\|") for cell in cells) + " |")
+            if i == 0:
+                lines.append("|" + "---|" * width)
+        self.blocks.append("\n".join(lines))
+
+
+def html_to_markdown(raw_content: bytes) -> str:
+    '''
+    Converts an EDGAR HTML/iXBRL document to compact markdown: text
+    blocks as paragraphs, headings as #-headings, data tables as pipe
+    tables. Inline XBRL tags are unwrapped, ix:header and hidden
+    sections dropped.
+    '''
+    if isinstance(raw_content, str):
+        raw_content = raw_content.encode("utf-8")
+
+    parser = etree.HTMLParser(target=_MarkdownTarget(), remove_comments=True, huge_tree=True)
+    for offset in range(0, len(raw_content), FEED_CHUNK_BYTES):
+        parser.feed(raw_content[offset:offset + FEED_CHUNK_BYTES])
+    return parser.close()
@@ -0,0 +1,57 @@
+######### Author: Kevin Garrison ##########
+
+
+from datetime import date, datetime
+import zstandard as zstd
+import pandas as pd
+import msgpack
+
+
+########################################################
+# Binary encoding for internal service hops: msgpack
+# (bytes stay bytes, no JSON escaping of filing HTML)
+# compressed with zstd. Negotiated via Accept and
+# Content-Type = MSGPACK_ZSTD, JSON stays the default.
+########################################################
+
+
+MSGPACK_ZSTD = "application/x-msgpack-zstd"
+
+
+def _default(obj):
+    if isinstance(obj, pd.DataFrame):
+        # same {column: {row: value}} shape jsonable_encoder produces
+        return {str(column): {str(index): value for index, value in values.items()} for column, values in obj.items()}
+    if isinstance(obj, (datetime, date, pd.Timestamp)):
+        return obj.isoformat()
+    if hasattr(obj, "item"):
+        # numpy scalars
+        return obj.item()
+    return str(obj)
+
+
+def packb(obj) -> bytes:
+    return zstd.ZstdCompressor(level=3).compress(msgpack.packb(obj, default=_default, use_bin_type=True))
+
+
+def unpackb(data: bytes):
+    return msgpack.unpackb(zstd.ZstdDecompressor().decompress(data), raw=False)
+
+
+class StreamPacker:
+    """
+    Packs a sequence of records into one zstd stream. Every record is
+    flushed as its own block, so the receiver can unpack it right away.
+    """
+
+    def __init__(self, level: int = 3):
+        self._compressor = zstd.ZstdCompressor(level=level).compressobj()
+
+
+    def pack(self, record: dict) -> bytes:
+        data = self._compressor.compress(msgpack.packb(record, default=_default, use_bin_type=True))
+        return data + self._compressor.flush(zstd.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+    def close(self) -> bytes:
+        return self._compressor.flush()
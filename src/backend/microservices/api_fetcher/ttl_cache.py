@@ -0,0 +1,245 @@
+######### Author: Kevin Garrison ##########
+
+
+from dataclasses import dataclass, field
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+import logging
+import asyncio
+import json
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int = 1
+    validators: dict = field(default_factory=dict)
+    stored_at: float = field(default_factory=time.monotonic)
+
+
+# A loader receives the previous entry (or None) and returns the new
+# (value, size, validators) tuple, or None when the upstream answered
+# "not modified" and the previous entry stays valid.
+Loader = Callable[[CacheEntry | None], Awaitable[tuple[Any, int, dict] | None]]
+
+
+@dataclass
+class TTLCache:
+    """
+    In-memory TTL cache with stale-while-revalidate.
+
+    Fresh entries (age < ttl) are served directly. Stale entries (age <
+    ttl + stale_ttl) are served immediately while one background task per
+    key reloads them. Anything older, or missing, is loaded inline, and
+    concurrent callers for the same key share that load. Memory is bounded
+    by max_bytes (sum of entry sizes) with LRU eviction, and entries past
+    ttl + stale_ttl are swept out at most once per that window.
+
+    With a redis.asyncio client the cache gets a second, shared tier:
+    local misses look into Redis before loading, and every load is written
+    back (as JSON, expiring after ttl + stale_ttl). track_keys keeps hit and
+    miss counters per key.
+    """
+    name: str
+    ttl: float
+    stale_ttl: float = 0.0
+    max_bytes: int = 64 * 1024 ** 2
+    redis_client: Any = None
+    track_keys: bool = False
+    hits: int = field(init=False, default=0)
+    stale_hits: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+    remote_hits: int = field(init=False, default=0)
+    evictions: int = field(init=False, default=0)
+    expirations: int = field(init=False, default=0)
+    _key_stats: dict = field(init=False, default_factory=dict)
+    _entries: OrderedDict = field(init=False, default_factory=OrderedDict)
+    _inflight: dict = field(init=False, default_factory=dict)
+    _bytes: int = field(init=False, default=0)
+    _swept_at: float = field(init=False, default_factory=time.monotonic)
+
+
+    def peek(self, key: str) -> CacheEntry | None:
+        return self._entries.get(key)
+
+
+    def get_fresh(self, key: str) -> CacheEntry | None:
+        """
+        Synchronous lookup for callers that load many keys in one batch
+        instead of per key: returns the entry while it is fresh, otherwise
+        None (and counts a miss). Does not look into Redis.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.stored_at < self.ttl:
+            self._count(key, "hits")
+            self._entries.move_to_end(key)
+            return entry
+        self._count(key, "misses")
+        return None
+
+
+    def set(self, key: str, value: Any, size: int = 1, validators: dict = None) -> CacheEntry:
+        self._sweep()
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        entry = CacheEntry(value=value, size=size, validators=validators or {})
+        self._entries[key] = entry
+        self._bytes += size
+        self._evict()
+        return entry
+
+
+    def invalidate(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+    def _sweep(self, force: bool = False):
+        '''
+        Drops every entry past ttl + stale_ttl. Entries are kept in LRU
+        order, not by age, so this is a full scan and runs at most once
+        per expiry window unless forced.
+        '''
+        now = time.monotonic()
+        horizon = self.ttl + self.stale_ttl
+        if not force and now - self._swept_at < horizon:
+            return
+        self._swept_at = now
+        expired = [key for key, entry in self._entries.items() if now - entry.stored_at >= horizon]
+        for key in expired:
+            self._bytes -= self._entries.pop(key).size
+        self.expirations += len(expired)
+
+
+    def _evict(self):
+        if self._bytes > self.max_bytes:
+            self._sweep(force=True)
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+
+    def _remote_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+
+    async def _read_remote(self, key: str) -> CacheEntry | None:
+        try:
+            raw = await self.redis_client.get(self._remote_key(key))
+            if raw is None:
+                return None
+            payload = json.loads(raw)
+        except Exception as e:
+            logger.warning(f"[{self.name}] Redis read of '{key}' failed: {e}")
+            return None
+
+        entry = self.set(key, payload["value"], size=len(raw), validators=payload.get("validators"))
+        # translate the wall clock age from Redis into this process' monotonic clock
+        entry.stored_at = time.monotonic() - max(0.0, time.time() - payload["stored_at"])
+        self.remote_hits += 1
+        return entry
+
+
+    async def _write_remote(self, key: str, entry: CacheEntry):
+        try:
+            payload = json.dumps(
+                {"value": entry.value, "validators": entry.validators, "stored_at": time.time()},
+                default=str
+            )
+            expiry = max(1, int(self.ttl + self.stale_ttl))
+            await self.redis_client.set(self._remote_key(key), payload, ex=expiry)
+        except Exception as e:
+            logger.warning(f"[{self.name}] Redis write of '{key}' failed: {e}")
+
+
+    async def _load(self, key: str, loader: Loader) -> CacheEntry | None:
+        previous = self._entries.get(key)
+        result = await loader(previous)
+        if result is None and previous is not None:
+            previous.stored_at = time.monotonic()
+            entry = previous
+            if self._entries.get(key) is not previous:
+                # swept or replaced while the revalidation was running
+                entry = self.set(key, previous.value, size=previous.size, validators=previous.validators)
+        elif result is None:
+            return None
+        else:
+            value, size, validators = result
+            entry = self.set(key, value, size=size, validators=validators)
+
+        if self.redis_client is not None:
+            await self._write_remote(key, entry)
+        return entry
+
+
+    def _start_load(self, key: str, loader: Loader) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finish_load(key, t))
+        return task
+
+
+    def _finish_load(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"[{self.name}] Reload of '{key}' failed: {task.exception()}")
+
+
+    def _count(self, key: str, outcome: str):
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        if self.track_keys:
+            key_stats = self._key_stats.setdefault(key, {"hits": 0, "stale_hits": 0, "misses": 0})
+            key_stats[outcome] += 1
+
+
+    async def get_or_load(self, key: str, loader: Loader) -> Any:
+        self._sweep()
+        entry = self._entries.get(key)
+        if entry is None and self.redis_client is not None and key not in self._inflight:
+            entry = await self._read_remote(key)
+
+        if entry is not None:
+            age = time.monotonic() - entry.stored_at
+            if age < self.ttl:
+                self._count(key, "hits")
+                self._entries.move_to_end(key)
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self._count(key, "stale_hits")
+                self._entries.move_to_end(key)
+                self._start_load(key, loader)
+                return entry.value
+
+        self._count(key, "misses")
+        entry = await asyncio.shield(self._start_load(key, loader))
+        return entry.value if entry is not None else None
+
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "remote_hits": self.remote_hits,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+    def key_stats(self) -> dict:
+        return {key: dict(counts) for key, counts in self._key_stats.items()}
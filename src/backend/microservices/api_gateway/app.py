@@ -2,9 +2,13 @@
 
 from fastapi.responses import Response, JSONResponse
 from fastapi import FastAPI, HTTPException, Query
+from payload_codec import MSGPACK_ZSTD, StreamUnpacker, packb
 from contextlib import asynccontextmanager
 import logging
+import asyncio
 import httpx
+import json
+import os
 
 
 logging.basicConfig(
@@ -16,45 +20,83 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-union_tickers = {}
+union_tickers = {"tickers": [], "screeners": [], "ticker_screener": [], "companies": []}
+
+
+COMPANIES_POLL_INTERVAL = float(os.getenv("COMPANIES_POLL_INTERVAL", 300))
+COMPANIES_RETRY_INTERVAL = float(os.getenv("COMPANIES_RETRY_INTERVAL", 15))
+COMPANIES_STARTUP_TIMEOUT = float(os.getenv("COMPANIES_STARTUP_TIMEOUT", 30))
+
+
+async def load_union_tickers(client: httpx.AsyncClient, timeout: float = None) -> bool:
+    '''
+    Pulls the company universe snapshot from the api-fetcher. The ETag of
+    the last snapshot is sent along, so an unchanged universe is a 304.
+    '''
+    headers = {}
+    if union_tickers.get("etag"):
+        headers["If-None-Match"] = union_tickers["etag"]
+
+    response = await client.get("http://api-fetcher:8001/companies", headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        return False
+
+    if response.status_code != 200:
+        logger.warning(f"[API-GATEWAY] Failed to fetch companies: {response.status_code}")
+        return False
+
+    result = response.json()
+    companies = result.get("companies", [])
+    screeners = result.get("screeners", [])
+    ticker_screeners = result.get("ticker_screener")
+
+    tickers = [entry.get("ticker") for entry in companies if "ticker" in entry]
+
+    union_tickers["tickers"] = sorted(set(tickers))
+    union_tickers["screeners"] = sorted(set(screeners))
+    union_tickers["ticker_screener"] = ticker_screeners
+    union_tickers["companies"] = companies
+    union_tickers["etag"] = response.headers.get("ETag")
+    union_tickers["freshness"] = result.get("freshness")
+    logger.info(f"[API-GATEWAY] Company universe updated: {len(union_tickers['tickers'])} tickers")
+    return True
+
+
+async def poll_union_tickers(client: httpx.AsyncClient):
+    while True:
+        # until a first universe arrived, ask again every few seconds
+        await asyncio.sleep(COMPANIES_POLL_INTERVAL if union_tickers.get("etag") else COMPANIES_RETRY_INTERVAL)
+        try:
+            await load_union_tickers(client, timeout=30)
+        except httpx.HTTPError as e:
+            logger.warning(f"[API-GATEWAY] Polling companies failed: {e}")
 
 ########################################################
 # Lifespan of the app: Gets all available companies by
 # taking the union of Yahoo finance and SEC.gov and 
 # stores the companies with their sec id and tickername
 # in some session state.
-# Before Ingesting the data with the next function wait
-# till the container is started completly.
+# The api-fetcher serves them from a snapshot that it
+# refreshes in the background. Startup waits at most
+# COMPANIES_STARTUP_TIMEOUT for it; without a universe
+# yet the gateway starts empty and the poller fills it
+# in, afterwards it polls for newer snapshots.
 ########################################################
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     async with httpx.AsyncClient() as client:
         logger.info("[API-GATEWAY] Lifespan starting")
-        response = await client.get("http://api-fetcher:8001/companies", timeout=None)
-
         logger.info("[API-GATEWAY] Startup task: building union of tickers for second filter")
+        try:
+            await load_union_tickers(client, timeout=COMPANIES_STARTUP_TIMEOUT)
+        except httpx.HTTPError as e:
+            logger.warning(f"[API-GATEWAY] No company universe at startup, the poller fills it in: {e}")
 
-        if response.status_code == 200:
-            result = response.json()
-            companies = result.get("companies", [])
-            screeners = result.get("screeners", [])
-            ticker_screeners = result.get("ticker_screener")
-
-            tickers = [entry.get("ticker") for entry in companies if "ticker" in entry]
-
-            union_tickers["tickers"] = sorted(set(tickers))
-            union_tickers["screeners"] = sorted(set(screeners))
-            union_tickers["ticker_screener"] = ticker_screeners
-            union_tickers["companies"] = companies
-
-        else:
-            logger.warning(f"[API-GATEWAY] Failed to fetch companies: {response.status_code}")
-            union_tickers["tickers"] = []
-            union_tickers["screeners"] = []
-            union_tickers["ticker_screener"] = []
-            union_tickers["companies"] = []
-
-    yield
+        poll_task = asyncio.create_task(poll_union_tickers(client))
+        try:
+            yield
+        finally:
+            poll_task.cancel()
 
     union_tickers.clear()
 ########################################################
@@ -171,18 +213,80 @@ async def delete_cache():
         return response.json()
 
 
+async def iter_context_records(response: httpx.Response):
+    if response.headers.get("content-type", "").startswith(MSGPACK_ZSTD):
+        unpacker = StreamUnpacker()
+        async for chunk in response.aiter_bytes():
+            for record in unpacker.feed(chunk):
+                yield record
+    else:
+        async for line in response.aiter_lines():
+            if line:
+                yield json.loads(line)
+
+
+async def stream_company_context(client: httpx.AsyncClient, ticker: str) -> dict:
+    """
+    Reads the record stream of the api-fetcher /company-context endpoint
+    (msgpack+zstd when offered, NDJSON otherwise) and rebuilds the shape of
+    its plain JSON answer:
+    {"yf_stock_data": {...}, "base_sec_df": {column: {row: value}}}
+    A stream that ends without its done record was cut off and raises.
+    """
+    company_json = {"yf_stock_data": {}, "base_sec_df": {}}
+    complete = False
+    async with client.stream(
+        "GET",
+        f"http://api-fetcher:8001/company-context/{ticker}",
+        params={"stream": "true"},
+        headers={"Accept": f"{MSGPACK_ZSTD}, application/x-ndjson"},
+        timeout=None
+    ) as response:
+        response.raise_for_status()
+        async for record in iter_context_records(response):
+            if record["type"] == "yf_stock_data":
+                company_json["yf_stock_data"] = record["data"]
+                logger.info(f"[API-GATEWAY] {ticker}: Yahoo facts received")
+            elif record["type"] == "filing":
+                for column, value in record["data"].items():
+                    company_json["base_sec_df"].setdefault(column, {})[str(record["index"])] = value
+                logger.info(f"[API-GATEWAY] {ticker}: filing {record['data'].get('form')} received")
+            elif record["type"] == "error":
+                raise RuntimeError(f"company-context failed: {record['detail']}")
+            elif record["type"] == "done":
+                complete = True
+
+    if not complete:
+        raise RuntimeError(f"company-context stream for {ticker} ended without a done record")
+
+    # filings arrive in completion order, keep the rows in index order
+    company_json["base_sec_df"] = {
+        column: dict(sorted(rows.items(), key=lambda item: int(item[0])))
+        for column, rows in company_json["base_sec_df"].items()
+    }
+    return company_json
+
+
 @app.get("/stock-broker-analysis/{ticker}")
 async def stock_broker_analysis(ticker: str):
     async with httpx.AsyncClient() as client:
+        # The forecast only needs the ticker, so it runs while the context streams in
+        forecast_task = asyncio.create_task(
+            client.get(f"http://forecasting:8003/forecast/{ticker}", timeout=None)
+        )
+
         # Step 1: Fetching files from SEC.gov
-        all_company_data = await client.get(f"http://api-fetcher:8001/company-context/{ticker}", timeout=None)
-        company_json = all_company_data.json()
+        try:
+            company_json = await stream_company_context(client, ticker)
+        except Exception:
+            forecast_task.cancel()
+            raise
         logger.info("[AI Result 1]: SEC files pulled")
 
         forecast_json = {}
         try:
             # Step 2: Calling the forecasting microservice 
-            forecast = await client.get(f"http://forecasting:8003/forecast/{ticker}", timeout=None)
+            forecast = await forecast_task
             if forecast.status_code == 200:
                 forecast_json = forecast.json()
                 history_data = forecast_json.get('history', [])
@@ -219,9 +323,11 @@ async def stock_broker_analysis(ticker: str):
 
         try:
             # Step 5 (Final): Calling the AI Agent to get the stock recommendation
+            # raw filings may still be bytes here, so the hop to the rag-chatbot is binary too
             response = await client.post(
                 f"http://rag-chatbot:8002/relevant-sec-files/{ticker}",
-                json=company_json,
+                content=await asyncio.to_thread(packb, company_json),
+                headers={"Content-Type": MSGPACK_ZSTD},
                 timeout=None
             )
             analysis = response.json()
@@ -293,7 +399,10 @@ async def proxy_logo(ticker: str):
         return Response(
             content=response.content,
             media_type="image/png",
-            headers={"Content-Disposition": f"inline; filename={ticker}_logo.png"}
+            headers={
+                "Content-Disposition": f"inline; filename={ticker}_logo.png",
+                "Cache-Control": response.headers.get("cache-control", "no-cache"),
+            }
         )
     except HTTPException as e:
         raise e
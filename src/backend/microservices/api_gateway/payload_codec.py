@@ -0,0 +1,38 @@
+######### Author: Kevin Garrison ##########
+
+
+import zstandard as zstd
+import msgpack
+
+
+########################################################
+# Counterpart of the api-fetcher payload codec: msgpack
+# compressed with zstd for internal service hops.
+########################################################
+
+
+MSGPACK_ZSTD = "application/x-msgpack-zstd"
+
+
+def packb(obj) -> bytes:
+    return zstd.ZstdCompressor(level=3).compress(msgpack.packb(obj, default=str, use_bin_type=True))
+
+
+def unpackb(data: bytes):
+    return msgpack.unpackb(zstd.ZstdDecompressor().decompress(data), raw=False)
+
+
+class StreamUnpacker:
+    """
+    Incrementally decodes a zstd stream of msgpack records as produced by
+    the api-fetcher StreamPacker.
+    """
+
+    def __init__(self):
+        self._decompressor = zstd.ZstdDecompressor().decompressobj()
+        self._unpacker = msgpack.Unpacker(raw=False)
+
+
+    def feed(self, chunk: bytes) -> list:
+        self._unpacker.feed(self._decompressor.decompress(chunk))
+        return list(self._unpacker)
@@ -1,11 +1,12 @@
 ######### Author: Kevin Garrison ##########
 
-from fastapi import FastAPI, HTTPException, Body, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.responses import JSONResponse, FileResponse
 from fastapi.encoders import jsonable_encoder
+from payload_codec import MSGPACK_ZSTD, unpackb
 from contextlib import asynccontextmanager
-from rag_chatbot import RAG_Chatbot
 from pydantic import BaseModel
+from rag_chatbot import RAG_Chatbot
 import pandas as pd
 import logging
 import asyncio
@@ -58,12 +59,29 @@ async def lifespan(app: FastAPI):
 app = FastAPI(lifespan=lifespan)
 
 
+async def read_context_data(request: Request) -> ContextData:
+    """
+    Accepts the context as JSON or, from the api-gateway, as msgpack+zstd
+    where the raw filings arrive as bytes instead of escaped strings.
+    """
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(MSGPACK_ZSTD):
+            payload = await asyncio.to_thread(unpackb, body)
+        else:
+            payload = json.loads(body)
+        return ContextData(**payload)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid context payload: {e}")
+
+
 @app.post("/relevant-sec-files/{ticker}")
 async def process_and_get_most_relevant_files(
     ticker: str,
-    context: ContextData = Body(...)
+    request: Request
 ):
     prompt = """Find the highest risk according to the 10k form"""
+    context = await read_context_data(request)
     context_dict = context.dict()
     
     yf_stock_data = context_dict['yf_stock_data']
@@ -0,0 +1,18 @@
+######### Author: Kevin Garrison ##########
+
+
+import zstandard as zstd
+import msgpack
+
+
+########################################################
+# Counterpart of the api-gateway payload codec: msgpack
+# compressed with zstd for internal service hops.
+########################################################
+
+
+MSGPACK_ZSTD = "application/x-msgpack-zstd"
+
+
+def unpackb(data: bytes):
+    return msgpack.unpackb(zstd.ZstdDecompressor().decompress(data), raw=False)